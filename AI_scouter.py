@@ -1,267 +1,107 @@
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-import pandas as pd
-import os
+from playwright.async_api import async_playwright
 import time
-import instaloader
-import sqlite3
-import random
+import argparse
+import queue
+import functools
+import asyncio
+from result_sink import open_result_sink
+from enrichment import EnrichmentPool
+from async_scouter import AsyncScouter, LoggedOut, ReelBrowser
+from scout_cache import ScoutCache
+from seen_index import SeenIndex
+from sharded_discovery import ShardSupervisor
+from session_manager import SessionManager
+from browser_profile import ENGINES, DISCOVERY_CONTEXT_OPTIONS, launch_browser, apply_discovery_profile_async
+from rate_limiter import AdaptiveRateLimiter
+from filters import FilterPipeline, COST_LOCAL, COST_PROFILE, seen_before, new_in_run, not_blocked, followers_in_range, with_reel_stats, load_blocklist, load_usernames
+from reel_stats import load_profile, refresh_reel_stats
+from results_db import ResultsDB
+from run_journal import RunJournal, DISCOVERED, ENRICHED, STORED
+from leaderboard import TopK
+from embed_parser import extract_username_from_embed_code
+from metrics import METRICS, SummaryReporter, start_metrics_server
 
 global instagram_username
 global instagram_password
 global Data 
 global temp
+global temp_fields
+global result_format
+global results_dir
+global results_db_path
+global cache_db
+global seen_index_path
+global run_journal_path
+global storage_state_path
+global max_users_to_log
+global leaderboard_size
+global min_followers
+global max_followers
+global blocklist_path
+global num_enrichment_workers
+global num_discovery_shards
+global num_discovery_pages
+global request_rate
+global max_request_rate
+global discovery_mode
+global max_idle_scrolls
+global ui_timeout
+global jitter_range
+global browser_engine
+global headless_browser
+global block_resources
+global metrics_port
+global summary_interval
 Data = 'Data.csv'
 temp = 'temp_data.csv'
+temp_fields = ['username', 'followers_count', 'engagement']
+result_format = 'sqlite'  # 'sqlite' upserts into results_db_path, 'csv' appends rows to temp, 'parquet' writes typed files per day and run under results_dir
+results_dir = 'results'
+results_db_path = 'scout_results.db'
+cache_db = 'scout_cache.db'
+seen_index_path = 'seen_usernames.bloom'
+run_journal_path = 'run_journal.db'  # Progress of the current run, so an interrupted run can resume
+storage_state_path = 'playwright_state.json'  # Browser cookies and localStorage kept between runs
+max_users_to_log = 1  # Set to the desired number of users to log
+leaderboard_size = 2  # Top creators by engagement written to Data
+min_followers = 0  # Follower band a creator must fall in: min_followers <= followers < max_followers
+max_followers = 100000
+blocklist_path = 'blocklist.txt'  # One username per line that is never scouted
+num_enrichment_workers = 4  # Threads looking up followers and reel stats while the browser keeps scrolling
+request_rate = 1.0  # Starting requests per second shared by the browser and instaloader, adapted to throttling
+max_request_rate = 3.0  # Ceiling the adaptive rate may climb to while Instagram does not throttle
+num_discovery_shards = 1  # Browser processes scrolling the Reels feed; more than 1 runs sharded discovery
+num_discovery_pages = 2  # Tabs scrolling the Reels feed concurrently on one event loop when there is a single shard
+discovery_mode = 'feed'  # 'feed' reads authors from the Reels feed responses, 'embed' opens the Embed modal for each reel
+max_idle_scrolls = 5  # Reload the Reels feed after this many scrolls without a new author
+ui_timeout = 10000  # Milliseconds to wait for a page element before giving up
+jitter_range = (0.2, 0.8)  # Seconds of human-like pause between interactions
+browser_engine = 'chromium'  # 'chromium', 'webkit' or 'firefox' for the discovery tabs
+headless_browser = True  # Set to False (or pass --headed) to see the browser window
+block_resources = True  # Skip video, images, fonts and analytics in the discovery tabs; only author handles are read
+metrics_port = 9108  # Stage timings and counters served at http://127.0.0.1:<port>/metrics; 0 turns the endpoint off
+summary_interval = 60  # Seconds between the [metrics] summary lines
 instagram_username = 'tauseeq.1'
 instagram_password = 'Pakistanzindabad!23'
 
-def load_session(L, username, password):
-    try:
-        L.load_session_from_file(username)
-    except FileNotFoundError:
-        # If the session file does not exist, login and create a session file
-        L.login(username, password)
-        L.save_session_to_file(username)
-        
-def random_delay(min_delay=2, max_delay=5):
-    """Wait for a random time between `min_delay` and `max_delay` seconds."""
-    time.sleep(random.uniform(min_delay, max_delay))
-
-def handle_2fa(page):
-    """Handles two-factor authentication if prompted."""
-    two_factor_code = input("Enter the two-factor authentication code: ")
-    page.fill("input[name='verificationCode']", two_factor_code)
-    page.click("button[type='submit']")
-    random_delay(5, 10)  # Random delay to mimic user waiting for 2FA to process
-
-def login_to_instagram(page, username, password):
-    print("Logging in to Instagram...")
-    page.goto('https://www.instagram.com/accounts/login/')
-    page.wait_for_selector("input[name='username']", state="visible")
-    page.fill("input[name='username']", username)
-    page.fill("input[name='password']", password)
-    page.click("button[type='submit']")
-    random_delay(5, 10)  # Random delay to wait for login to complete
-    # Check if 2FA is required
-    if page.is_visible("input[name='verificationCode']"):
-        handle_2fa(page)
-
-def navigate_to_reels(page):
-    """Navigates to the Instagram Reels page."""
-    print("Navigating to Reels...")
-    page.goto('https://www.instagram.com/reels/')
-    page.wait_for_load_state('networkidle')
-    print("Navigated to Reels.")
-
-
-def scroll_to_next_reel(page):
-    """Scrolls down to the next Instagram Reel."""
-    print("Scrolling to the next Reel...")
-    page.mouse.wheel(0, random.randint(300, 700))  # Random scroll distance
-    random_delay(1, 3)  # Random delay after scroll
-    print("Scrolled to the next Reel.")
-
-
-def click_more_options_and_embed(page):
-    """Clicks 'More Options', 'Embed', extracts the embed code, and extracts the username."""
-    print("Clicking 'More Options' button...")
-    retries = 3  # Number of retries
-    retry_delay = 2  # Delay between retries in seconds
-    username = None  # Initialize username to None
-
-    for attempt in range(retries):
-        more_options_button = page.query_selector('svg[aria-label="More"]')
-        if more_options_button:
-            more_options_button.click()
-            print("Clicked 'More Options' button.")
-            page.wait_for_timeout(2000)
-
-            # Click 'Embed' and extract the embed code
-            embed_button = page.query_selector('text=Embed')
-            if embed_button:
-                embed_button.click()
-                print("Clicked 'Embed'.")
-                page.wait_for_timeout(2000)
-                
-                # Locate the embed code textarea and extract the username
-                embed_code_textarea = page.query_selector("textarea")
-                if embed_code_textarea:
-                    embed_code = embed_code_textarea.input_value()
-                    print("Embed code extracted.")
-                    username = extract_username_from_embed_code(embed_code)
-                    if username:
-                        print("Username extracted:", username)
-                        return username  # If username is found, return it immediately
-                    else:
-                        print("Username could not be extracted.")
-                else:
-                    print("Embed code textarea not found.")
-            else:
-                print("'Embed' option not found.")
-            break  # Break the loop if 'More Options' was found, even if no username was extracted
-        else:
-            print(f"'More Options' button not found, retrying... (Attempt {attempt + 1} of {retries})")
-            page.wait_for_timeout(retry_delay * 1000)  # Wait before retrying
-            scroll_to_next_reel(page)  # Scroll a bit to check if it triggers the button to appear
-
-    print("Finished attempts to find 'More Options' button.")
-    return username  # Return username, which will be None if not found
-
-def extract_username_from_embed_code(embed_code):
-    """Extracts the Instagram username from the embed code."""
-    soup = BeautifulSoup(embed_code, "html.parser")
-    a_tag = soup.find("a", string=lambda text: "A post shared by" in text if text else False)
-    if not a_tag:
-        return None
-    text_content = a_tag.get_text(strip=True)
-    username = text_content.split('@')[-1].split(')')[0].strip()
-    return username
-
-def save_username_to_csv(username, followers_count, engagement, csv_path):
-    """Saves the Instagram username, follower count, and engagement to a CSV file."""
-    new_row = pd.DataFrame({
-        'username': [username],
-        'followers_count': [followers_count],
-        'engagement': [engagement]
+def save_username_to_csv(username, followers_count, engagement, sink, **reel_stats):
+    """Saves the Instagram username, follower count, and engagement to a CSV file.
+
+    Reel totals (likes, comments, views, reel_count) and the per-reel 'reels' list are kept
+    by the sinks that store them, like the Parquet and SQLite ones.
+    """
+    sink.write({
+        'username': username,
+        'followers_count': followers_count,
+        'engagement': engagement,
+        **reel_stats,
     })
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        df = pd.concat([df, new_row], ignore_index=True)
-    else:
-        df = new_row
-    df.to_csv(csv_path, index=False)
-    print(f"Username, followers, and engagement saved to {csv_path}")
-
-def check_login_status(page):
-    # Check if login fields are present which indicates we are logged out
-    if page.is_visible("input[name='username']"):
-        print("Not logged in. Attempting to log back in...")
-        login_to_instagram(page, instagram_username, instagram_password)
-
-def close_options_modal(page):
-    """Closes the 'More Options' modal by clicking outside it twice."""
-    print("Closing 'More Options' modal...")
-    
-    # Click outside the modal twice to close it
-    page.mouse.click(10, 10)  # Click outside the modal (first click)
-    page.wait_for_timeout(1000)
-    
-    page.mouse.click(10, 10)  # Click outside the modal again (second click)
-    page.wait_for_timeout(1000)
-    
-    print("Closed 'More Options' modal.")
-    
-def parse_followers_count(followers_text):
-    """Parse the followers count text to an integer."""
-    followers_text = followers_text.lower().replace(',', '')
-    multiplier = 1
-
-    if 'k' in followers_text:
-        multiplier = 1000
-        followers_text = followers_text.replace('k', '')
-    elif 'm' in followers_text:
-        multiplier = 1000000
-        followers_text = followers_text.replace('m', '')
-
-    # For counts like '1,234' after removing 'k' or 'm'
-    if '.' in followers_text:
-        parts = followers_text.split('.')
-        main_part = parts[0]
-        decimal_part = parts[1]
-        # Adjust the multiplier based on the number of decimal places
-        multiplier /= 10 ** len(decimal_part)
-        followers_text = main_part + decimal_part
-
-    return int(float(followers_text) * multiplier)
-
-def get_followers_count(page, username):
-    """Gets the number of followers for a given username."""
-    profile_url = f'https://www.instagram.com/{username}/'
-    page.goto(profile_url)
-    page.wait_for_selector('header section ul li a span', state='visible')  # Adjust the selector based on the current Instagram layout
-    followers_element = page.query_selector('header section ul li a span')
-    followers_count_text = followers_element.inner_text()
-
-    # Use the helper function to parse the text to an integer
-    followers_count = parse_followers_count(followers_count_text)
-    return followers_count
-
-def get_total_likes_of_last_reels(L, username, max_reels=10):
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_likes = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_likes += post.likes
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_likes
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-        return None
-    except Exception as e:
-        print(f"An error occurred when getting total likes: {e}")
-        return None
+    print(f"Username, followers, and engagement saved to {sink.path}")
 
-def get_total_comments_of_last_reels(L, username, max_reels=10):
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_comments = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_comments += post.comments
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_comments
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-        return None
-    except Exception as e:
-        print(f"An error occurred when getting total comments: {e}")
-        return None
-    
-def save_top_engagements_to_final_csv(csv_path, final_csv_path, top_n=2):
-    """Reads the CSV file, selects top N engagements, and saves to a final CSV file."""
-    df = pd.read_csv(temp)
-    df_sorted = df.sort_values(by='engagement', ascending=False).head(top_n)
-    df_sorted.to_csv(final_csv_path, index=False)
-    print(f"Top {top_n} engagements saved to {final_csv_path}") 
-
-def get_total_views_of_last_reels(L, username, max_reels=10):
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_views = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_views += post.video_view_count
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_views
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-        return None
-    except Exception as e:
-        print(f"An error occurred when getting total views: {e}")
-        return None
+def save_top_engagements_to_final_csv(leaderboard, final_csv_path, top_n=None):
+    """Saves the top N engagements tracked while creators were scored to a final CSV file."""
+    leaderboard.write_csv(final_csv_path, temp_fields, top_n)
+    print(f"Top {top_n or leaderboard.k} engagements saved to {final_csv_path}")
 
 def calculate_engagement(total_likes, total_comments, total_views):
     """Calculates the engagement rate."""
@@ -269,68 +109,335 @@ def calculate_engagement(total_likes, total_comments, total_views):
         return 0
     return (total_likes + total_comments) / total_views
 
-def check_and_relogin_if_needed(page, username, password):
-    """Checks if the login page is visible, indicating a logout, and logs back in if needed."""
-    if page.is_visible("input[name='username']"):  # Adjust the selector as per Instagram's layout
-        print("Detected logout, attempting to log back in...")
-        login_to_instagram(page, username, password)
-        navigate_to_reels(page)  # Navigate back to reels after logging in
-
-def main():
+def build_result(username, followers_count, reel_stats, engagement):
+    """The row stored for a scored creator, with the reel totals and the reels it was scored on."""
+    return {
+        'username': username,
+        'followers_count': followers_count,
+        'likes': reel_stats['likes'],
+        'comments': reel_stats['comments'],
+        'views': reel_stats['views'],
+        'reel_count': reel_stats['reel_count'],
+        'reels': reel_stats.get('reels', []),
+        'engagement': engagement,
+    }
+
+def enrich_username(L, username, pipeline):
+    """Runs a discovered username through the network stages; returns the row to store or None to skip it."""
+    candidate = {'username': username}
+    if not pipeline.run(candidate, state=L, min_cost=COST_PROFILE):
+        return None
+    return build_result(username, candidate['followers_count'], candidate['reel_stats'], candidate['engagement'])
+
+def enrich_and_record(L, username, pipeline, journal, seen):
+    """Enriches a queued username and records the outcome.
+
+    A skipped creator goes into the journal and the seen index, a scored one into the
+    journal until its row is on disk. Errors such as a logged-out session are raised
+    and record nothing, so the creator is retried rather than skipped for good.
+    """
+    result = enrich_username(L, username, pipeline)
+    if result is None:
+        journal.mark_skipped(username)
+        seen.check_and_add(username)
+    else:
+        journal.mark_enriched(username, result)
+    return result
+
+def refresh_username(L, username, db):
+    """Re-scores a stored creator, reading only the reels posted since its last snapshot."""
+    with METRICS.time('refresh') as timing:
+        result = _refresh_username(L, username, db)
+        if result is None:
+            timing.outcome = 'skipped'
+    return result
+
+def _refresh_username(L, username, db):
+    profile = load_profile(L, username)
+    if profile is None:
+        return None
+    reel_stats = refresh_reel_stats(L, username, db.latest_reels(username), profile=profile)
+    if reel_stats is None:
+        return None
+    engagement = calculate_engagement(reel_stats['likes'], reel_stats['comments'], reel_stats['views'])
+    return build_result(username, profile.followers, reel_stats, engagement)
+
+def refresh_watchlist(args, session, limiter):
+    """Re-scores the watchlist (every stored creator by default) in the results database and stops."""
+    db = ResultsDB(results_db_path)
+    usernames = load_usernames(args.watchlist) if args.watchlist else db.usernames()
+    print(f"Refreshing {len(usernames)} creators...")
+    def store(result):
+        with METRICS.time('save'):
+            db.write(result)
+
+    pool = EnrichmentPool(
+        lambda worker_L, username: refresh_username(session.refresh(worker_L), username, db),
+        store,
+        num_workers=num_enrichment_workers,
+        worker_init=session.new_instaloader,
+        limiter=limiter,
+    )
+    try:
+        for username in usernames:
+            pool.submit(username)
+        pool.stop(drain=True)
+    finally:
+        pool.stop()
+        db.close()
+    print(f"Refreshed {pool.enriched} of {len(usernames)} creators ({pool.failed} failed) "
+          f"with {limiter.acquired} requests to Instagram.")
+
+def parse_args(argv=None):
+    """Reads the run settings from the command line, defaulting to the values configured at the top of this file."""
+    parser = argparse.ArgumentParser(description="Scout Instagram Reels creators by engagement.")
+    parser.add_argument('--max-users', type=int, default=max_users_to_log, help="number of creators to store before stopping")
+    parser.add_argument('--min-followers', type=int, default=min_followers, help="lowest follower count to keep")
+    parser.add_argument('--max-followers', type=int, default=max_followers, help="follower count from which creators are skipped")
+    parser.add_argument('--blocklist', default=blocklist_path, help="file with one username per line to never scout")
+    parser.add_argument('--shards', type=int, default=num_discovery_shards, help="browser processes discovering reels in parallel")
+    parser.add_argument('--pages', type=int, default=num_discovery_pages, help="tabs discovering reels concurrently in a single process")
+    parser.add_argument('--engine', choices=ENGINES, default=browser_engine, help="browser engine for discovery")
+    parser.add_argument('--headed', dest='headless', action='store_false', default=headless_browser, help="show the discovery browser window")
+    parser.add_argument('--fresh', action='store_true', help="start a new run instead of resuming an interrupted one")
+    parser.add_argument('--format', choices=['sqlite', 'csv', 'parquet'], default=result_format, help="how stored creators are written")
+    parser.add_argument('--metrics-port', type=int, default=metrics_port, help="port of the local metrics endpoint, 0 to disable it")
+    parser.add_argument('--refresh', action='store_true', help="re-score creators already in the results database instead of scouting")
+    parser.add_argument('--watchlist', help="with --refresh, file with one username per line to re-score instead of every stored creator")
+    return parser.parse_args(argv)
+
+def submit_discovered(usernames, pipeline, pool):
+    """Runs the local filter stages on discovered usernames and queues the survivors for enrichment."""
+    for username in usernames:
+        # Duplicates and blocked users are rejected before any network work is spent on them
+        if pipeline.run({'username': username}, max_cost=COST_LOCAL):
+            pool.submit(username)
+
+def discover_shard(shard_id, usernames, stop_event, stats, storage_state=None, engine=browser_engine, headless=headless_browser):
+    """Runs one discovery shard in its own process: its own browser and feed session on the parent's cookies."""
+    asyncio.run(_discover_shard(shard_id, usernames, stop_event, stats, storage_state, engine, headless))
+
+async def _discover_shard(shard_id, usernames, stop_event, stats, storage_state, engine, headless):
+    # Each shard paces its own browser with a limiter of its own. It never logs in itself: a spawned
+    # process has no terminal for the 2FA prompt, so a logged-out tab ends the shard instead
+    limiter = AdaptiveRateLimiter(request_rate, max_rate=max_request_rate)
+    # The tab is driven like the single-process tabs, in the same discovery mode and with the Embed modal fallback
+    tab = ReelBrowser(None, limiter, extract_username_from_embed_code, discovery_mode, max_idle_scrolls, ui_timeout, jitter_range)
+    discovered = 0
+    status = 'stopped'
+
+    def stopped():
+        # Asked once per reel, so it doubles as the shard's heartbeat
+        stats[shard_id] = {'discovered': discovered, 'heartbeat': time.time(), 'status': 'running'}
+        return stop_event.is_set()
+
+    async def hand_over(username):
+        nonlocal discovered
+        try:
+            await asyncio.to_thread(usernames.put, username, timeout=5)
+            discovered += 1
+        except queue.Full:
+            pass  # The parent is behind; the author may well turn up again
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p, engine, headless)
+        blocker = None
+        try:
+            context = await browser.new_context(storage_state=storage_state, **DISCOVERY_CONTEXT_OPTIONS)
+            if block_resources:
+                blocker = await apply_discovery_profile_async(context)
+            try:
+                await tab.discover(await context.new_page(), hand_over, stopped, f"Shard {shard_id}")
+            except LoggedOut:
+                # Exits cleanly, since a restart on the same cookies would be logged out again
+                print(f"Shard {shard_id} was logged out of Instagram and stops discovering.")
+                status = 'logged out'
+        finally:
+            stats[shard_id] = {'discovered': discovered, 'heartbeat': time.time(), 'status': status}
+            if blocker is not None:
+                print(f"Shard {shard_id} browser requests: {blocker.stats()}")
+            await browser.close()
+
+def discover_with_shards(args, pipeline, pool, storage_state):
+    """Discovers creators with several browser processes feeding one de-duplicated queue until the global target is met."""
+    # Shards are spawned fresh, so the session and the browser settings from the command line are handed over explicitly
+    shard = functools.partial(discover_shard, storage_state=storage_state, engine=args.engine, headless=args.headless)
+    supervisor = ShardSupervisor(shard, args.shards)
+    last_report = time.time()
+    try:
+        while pool.stored < args.max_users:
+            # Restart crashed shards before deciding whether any is left; reports are printed once a minute
+            report = supervisor.check_health()
+            if time.time() - last_report > 60:
+                print("\n".join(report))
+                last_report = time.time()
+            if not supervisor.alive():
+                break
+            username = supervisor.next_username(timeout=1.0)
+            if username:
+                submit_discovered([username], pipeline, pool)
+        print("\n".join(supervisor.check_health()))
+        print(f"{supervisor.duplicates} usernames were found by more than one shard.")
+    finally:
+        supervisor.stop()
+
+def main(argv=None):
     start_time = time.time()
     """Main function to run the Instagram scraper."""
+    args = parse_args(argv)
     if not instagram_username or not instagram_password:
         raise ValueError("Instagram credentials are not set.")
 
-    L = instaloader.Instaloader()
-    load_session(L, instagram_username, instagram_password)  # Load or create a session
-
-    with sync_playwright() as p:
-        browser = p.webkit.launch(headless=False)  # Set headless=False to see the browser window
-        page = browser.new_page()
-        login_to_instagram(page, instagram_username, instagram_password)
+    # Log in once; the browser and every enrichment worker reuse the same cookies and share one request budget
+    limiter = AdaptiveRateLimiter(request_rate, max_rate=max_request_rate)
+    session = SessionManager(instagram_username, instagram_password, storage_state_path, limiter)
+    session.cookies()
 
-        # Check for two-factor authentication (2FA) if needed
-        if page.is_visible("input[name='verificationCode']"):
-            handle_2fa(page)
+    # Per-stage timings for a long run: scraped from the endpoint and summed up in a periodic log line
+    metrics_server = start_metrics_server(METRICS, args.metrics_port) if args.metrics_port else None
+    reporter = SummaryReporter(METRICS, summary_interval)
+    if args.refresh:
+        try:
+            refresh_watchlist(args, session, limiter)
+        finally:
+            reporter.stop()
+            if metrics_server is not None:
+                metrics_server.stop()
+        return
+
+    cache = ScoutCache(cache_db)  # Follower counts and reel stats from earlier runs
+    seen = SeenIndex(seen_index_path)  # Every username stored or skipped in this or an earlier run
+    seen.load_from_csv([temp, Data])
+    if args.format == 'sqlite':
+        # A rebuilt index would otherwise evaluate every creator the database already holds again
+        with ResultsDB(results_db_path) as db:
+            seen.load_usernames(db.usernames())
+
+    # Resume the last interrupted run unless asked not to; its target wins over --max-users
+    journal = RunJournal(run_journal_path, target=args.max_users, fresh=args.fresh)
+    progress = journal.progress()
+    if journal.resumed:
+        print(f"Resuming run {journal.run_id}: {progress[STORED]} of {journal.target} creators stored, "
+              f"{progress[DISCOVERED]} waiting for enrichment, {progress[ENRICHED]} scored but not stored yet.")
+    elif journal.carried_over:
+        print(f"Queueing {journal.carried_over} usernames earlier runs discovered but never finished.")
+
+    def mark_stored(rows):
+        for row in rows:
+            journal.mark_stored(row['username'])
+            seen.check_and_add(row['username'])
+
+    # Opened once, rows are appended as they come and marked stored in the journal once they are on disk
+    if args.format == 'sqlite':
+        sink = open_result_sink(results_db_path, temp_fields, 'sqlite', run_id=journal.run_id, on_flush=mark_stored)
+    elif args.format == 'parquet':
+        sink = open_result_sink(results_dir, temp_fields, 'parquet', run_id=journal.run_id, on_flush=mark_stored)
+    else:
+        sink = open_result_sink(temp, temp_fields, on_flush=mark_stored)
+
+    # Cheap local checks run in the browser loop, network stages only for the candidates that survive them;
+    # the journal de-duplicates within the run, the seen index only holds usernames that were stored or skipped
+    pipeline = FilterPipeline([
+        seen_before(seen),
+        not_blocked(load_blocklist(args.blocklist)),
+        new_in_run(journal),
+        followers_in_range(args.min_followers, args.max_followers, cache),
+        with_reel_stats(calculate_engagement, cache),
+    ])
+
+    # Best creators of this run, updated as rows are stored; earlier sessions of a resumed run count too
+    leaderboard = TopK(leaderboard_size)
+    for result in journal.results(STORED):
+        leaderboard.add(result)
+
+    def store(result):
+        reel_stats = {field: result[field] for field in ('likes', 'comments', 'views', 'reel_count', 'reels') if field in result}
+        with METRICS.time('save'):
+            save_username_to_csv(result['username'], result['followers_count'], result['engagement'], sink, **reel_stats)
+        leaderboard.add(result)
+        print(f"Stored {result['username']} with {result['followers_count']} followers and an engagement of {result['engagement']}.")
+
+    def enrich(worker_L, username):
+        # Workers keep their Instaloader for the whole run; a browser re-login hands them the renewed cookies here
+        return enrich_and_record(session.refresh(worker_L), username, pipeline, journal, seen)
+
+    if args.shards > 1:
+        # Shard processes only discover usernames; a thread pool enriches and stores them
+        runner = EnrichmentPool(
+            enrich,
+            store,
+            num_workers=num_enrichment_workers,
+            worker_init=session.new_instaloader,  # One Instaloader per worker, built from the shared cookies
+            limiter=limiter,  # Failed lookups are retried later instead of dropped
+        )
+    else:
+        # Discovery tabs, lookups and storage run as tasks on one event loop
+        runner = AsyncScouter(
+            session,
+            pipeline,
+            enrich,
+            store,
+            extract_username_from_embed_code,
+            num_pages=args.pages,
+            num_workers=num_enrichment_workers,
+            worker_init=session.new_instaloader,
+            engine=args.engine,
+            headless=args.headless,
+            block_resources=block_resources,
+            discovery_mode=discovery_mode,
+            max_idle_scrolls=max_idle_scrolls,
+            ui_timeout=ui_timeout,
+            jitter_range=jitter_range,
+        )
 
-        num_users_logged = 0
-        max_users_to_log = 1  # Set to the desired number of users to log
+    try:
+        # Finish what the interrupted run left behind before discovering anything new
+        unstored = journal.results(ENRICHED)
+        for result in unstored:
+            store(result)
+        # Only the creators still missing count against this session's target
+        args.max_users = max(0, journal.target - progress[STORED] - len(unstored))
+
+        if args.shards > 1:
+            for username in journal.usernames(DISCOVERED):
+                runner.submit(username)
+            discover_with_shards(args, pipeline, runner, session.storage_state())
+            # Let in-flight lookups finish and drop whatever is still queued
+            runner.stop()
+        else:
+            # Returns once enough creators are stored, after in-flight lookups were stored too
+            asyncio.run(runner.run(args.max_users, journal.usernames(DISCOVERED)))
+
+        # Once we have logged 20 users, save the top 5 engagements to the final CSV
+        if runner.stored >= args.max_users:
+            sink.flush()  # Every stored row is on disk before the run is marked finished
+            if args.format == 'sqlite':
+                # Best creators of the follower band over every run, straight from the indexes
+                sink.export_top_csv(Data, leaderboard_size, args.min_followers, args.max_followers, temp_fields)
+                print(f"Top {leaderboard_size} engagements saved to {Data}")
+            else:
+                save_top_engagements_to_final_csv(leaderboard, Data)
+            journal.finish()
 
-        try:
-            while num_users_logged < max_users_to_log:
-                navigate_to_reels(page)
-                username = click_more_options_and_embed(page)
-                if username:
-                    followers_count = get_followers_count(page, username)
-                    if followers_count < 100000:  # Store only if followers count is less than 10k
-                        total_likes = get_total_likes_of_last_reels(L, username)
-                        total_comments = get_total_comments_of_last_reels(L, username)
-                        total_views = get_total_views_of_last_reels(L, username)
-
-                        if total_likes is not None and total_comments is not None and total_views is not None:
-                            engagement = calculate_engagement(total_likes, total_comments, total_views)
-                            save_username_to_csv(username, followers_count, engagement, temp)
-                            print(f"Stored {username} with {followers_count} followers and an engagement of {engagement}.")
-                            num_users_logged += 1
-
-                    else:
-                        print(f"Skipped {username} with {followers_count} followers (10k or more).")
-
-                # Check and re-login if needed, then continue to scroll the reels
-                check_and_relogin_if_needed(page, instagram_username, instagram_password)
-                scroll_to_next_reel(page)
-
-            # Once we have logged 20 users, save the top 5 engagements to the final CSV
-            if num_users_logged >= max_users_to_log:
-                save_top_engagements_to_final_csv(temp, Data)
-
-        except Exception as e:
-            print(f"An error occurred: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+    finally:
+        if args.shards > 1:
+            runner.stop()
+        seen.save()
+        sink.close()
+        print(f"Enriched {runner.enriched} of {runner.submitted} discovered users ({runner.failed} skipped or failed, {runner.retried} retries).")
+        print(f"Rate limiter stats: {limiter.stats()}")
+        pipeline.print_stats()
+        print(f"Cache stats: {cache.stats()}")
+        print(f"Run {journal.run_id}: {journal.progress()}")
+        cache.close()
+        journal.close()
+        reporter.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
 
-        finally:
-            browser.close()
-    
     end_time = time.time()
     elapsed_time = end_time - start_time
     print(f"Program finished in {elapsed_time:.2f} seconds.")
@@ -1,47 +1,48 @@
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-import pandas as pd
-import os
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import time
-import instaloader
-import sqlite3
 import random
+from result_sink import CsvResultSink
+from session_manager import SessionManager
+from rate_limiter import RetryQueue
+from filters import FilterPipeline, not_blocked, followers_in_range, with_reel_stats, load_blocklist
+from embed_parser import extract_username_from_embed_code
 
 global instagram_username
 global instagram_password
 CSV_PATH = 'data_1.csv'
+CSV_FIELDS = ['username', 'followers_count', 'engagement']
+MIN_FOLLOWERS = 0  # Follower band a creator must fall in: MIN_FOLLOWERS <= followers < MAX_FOLLOWERS
+MAX_FOLLOWERS = 10000
+BLOCKLIST_PATH = 'blocklist.txt'  # One username per line that is never scouted
+UI_TIMEOUT = 10000  # Milliseconds to wait for a page element before giving up
+JITTER_RANGE = (0.2, 0.8)  # Seconds of human-like pause between interactions
 instagram_username = '106recordsofficial'
 instagram_password = 'Pakistanzindabad12345'
 
-def load_session(L, username, password):
-    try:
-        L.load_session_from_file(username)
-    except FileNotFoundError:
-        # If the session file does not exist, login and create a session file
-        L.login(username, password)
-        L.save_session_to_file(username)
-        
-def random_delay(min_delay=2, max_delay=5):
-    """Wait for a random time between `min_delay` and `max_delay` seconds."""
-    time.sleep(random.uniform(min_delay, max_delay))
+def human_jitter():
+    """Short random pause between interactions so the clicks don't fire at machine speed."""
+    time.sleep(random.uniform(*JITTER_RANGE))
 
 def handle_2fa(page):
     """Handles two-factor authentication if prompted."""
     two_factor_code = input("Enter the two-factor authentication code: ")
     page.fill("input[name='verificationCode']", two_factor_code)
     page.click("button[type='submit']")
-    random_delay(5, 10)  # Random delay to mimic user waiting for 2FA to process
+    # Wait until Instagram leaves the two-factor page instead of sleeping a fixed time
+    page.wait_for_url(lambda url: 'two_factor' not in url, timeout=UI_TIMEOUT * 3)
 
 def login_to_instagram(page, username, password):
     print("Logging in to Instagram...")
     page.goto('https://www.instagram.com/accounts/login/')
     page.wait_for_selector("input[name='username']", state="visible")
+    human_jitter()
     page.fill("input[name='username']", username)
     page.fill("input[name='password']", password)
     page.click("button[type='submit']")
-    random_delay(5, 10)  # Random delay to wait for login to complete
-    # Check if 2FA is required
-    if page.is_visible("input[name='verificationCode']"):
+    # Login is done once the browser leaves the login form (the 2FA page lives under /accounts/login/two_factor)
+    page.wait_for_url(lambda url: not url.rstrip('/').endswith('/accounts/login'), timeout=UI_TIMEOUT * 3)
+    if 'two_factor' in page.url:
+        page.wait_for_selector("input[name='verificationCode']", state="visible", timeout=UI_TIMEOUT)
         handle_2fa(page)
 
 def navigate_to_reels(page):
@@ -56,7 +57,7 @@ def scroll_to_next_reel(page):
     """Scrolls down to the next Instagram Reel."""
     print("Scrolling to the next Reel...")
     page.mouse.wheel(0, random.randint(300, 700))  # Random scroll distance
-    random_delay(1, 3)  # Random delay after scroll
+    human_jitter()  # The next step waits for the reel's controls itself
     print("Scrolled to the next Reel.")
 
 
@@ -64,27 +65,38 @@ def click_more_options_and_embed(page):
     """Clicks 'More Options', 'Embed', extracts the embed code, and extracts the username."""
     print("Clicking 'More Options' button...")
     retries = 3  # Number of retries
-    retry_delay = 2  # Delay between retries in seconds
     username = None  # Initialize username to None
 
     for attempt in range(retries):
-        more_options_button = page.query_selector('svg[aria-label="More"]')
+        try:
+            more_options_button = page.wait_for_selector('svg[aria-label="More"]', state="visible", timeout=UI_TIMEOUT)
+        except PlaywrightTimeoutError:
+            more_options_button = None
         if more_options_button:
+            human_jitter()
             more_options_button.click()
             print("Clicked 'More Options' button.")
-            page.wait_for_timeout(2000)
 
-            # Click 'Embed' and extract the embed code
-            embed_button = page.query_selector('text=Embed')
+            # Click 'Embed' as soon as the options modal shows it
+            try:
+                embed_button = page.wait_for_selector('text=Embed', state="visible", timeout=UI_TIMEOUT)
+            except PlaywrightTimeoutError:
+                embed_button = None
             if embed_button:
+                human_jitter()
                 embed_button.click()
                 print("Clicked 'Embed'.")
-                page.wait_for_timeout(2000)
-                
-                # Locate the embed code textarea and extract the username
-                embed_code_textarea = page.query_selector("textarea")
-                if embed_code_textarea:
-                    embed_code = embed_code_textarea.input_value()
+
+                # Wait until the embed code textarea has been filled in, then extract the username
+                try:
+                    page.wait_for_function(
+                        "() => { const t = document.querySelector('textarea'); return t && t.value.length > 0; }",
+                        timeout=UI_TIMEOUT,
+                    )
+                    embed_code = page.input_value("textarea")
+                except PlaywrightTimeoutError:
+                    embed_code = None
+                if embed_code:
                     print("Embed code extracted.")
                     username = extract_username_from_embed_code(embed_code)
                     if username:
@@ -99,36 +111,19 @@ def click_more_options_and_embed(page):
             break  # Break the loop if 'More Options' was found, even if no username was extracted
         else:
             print(f"'More Options' button not found, retrying... (Attempt {attempt + 1} of {retries})")
-            page.wait_for_timeout(retry_delay * 1000)  # Wait before retrying
             scroll_to_next_reel(page)  # Scroll a bit to check if it triggers the button to appear
 
     print("Finished attempts to find 'More Options' button.")
     return username  # Return username, which will be None if not found
 
-def extract_username_from_embed_code(embed_code):
-    """Extracts the Instagram username from the embed code."""
-    soup = BeautifulSoup(embed_code, "html.parser")
-    a_tag = soup.find("a", string=lambda text: "A post shared by" in text if text else False)
-    if not a_tag:
-        return None
-    text_content = a_tag.get_text(strip=True)
-    username = text_content.split('@')[-1].split(')')[0].strip()
-    return username
-
-def save_username_to_csv(username, followers_count, engagement, csv_path):
+def save_username_to_csv(username, followers_count, engagement, sink):
     """Saves the Instagram username, follower count, and engagement to a CSV file."""
-    new_row = pd.DataFrame({
-        'username': [username],
-        'followers_count': [followers_count],
-        'engagement': [engagement]
+    sink.write({
+        'username': username,
+        'followers_count': followers_count,
+        'engagement': engagement
     })
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        df = pd.concat([df, new_row], ignore_index=True)
-    else:
-        df = new_row
-    df.to_csv(csv_path, index=False)
-    print(f"Username, followers, and engagement saved to {csv_path}")
+    print(f"Username, followers, and engagement saved to {sink.csv_path}")
 
 def check_login_status(page):
     # Check if login fields are present which indicates we are logged out
@@ -137,143 +132,59 @@ def check_login_status(page):
         login_to_instagram(page, instagram_username, instagram_password)
 
 def close_options_modal(page):
-    """Closes the 'More Options' modal by clicking outside it twice."""
+    """Closes the 'More Options' and 'Embed' modals by clicking outside them."""
     print("Closing 'More Options' modal...")
-    
-    # Click outside the modal twice to close it
-    page.mouse.click(10, 10)  # Click outside the modal (first click)
-    page.wait_for_timeout(1000)
-    
-    page.mouse.click(10, 10)  # Click outside the modal again (second click)
-    page.wait_for_timeout(1000)
-    
-    print("Closed 'More Options' modal.")
-    
-def parse_followers_count(followers_text):
-    """Parse the followers count text to an integer."""
-    followers_text = followers_text.lower().replace(',', '')
-    multiplier = 1
-
-    if 'k' in followers_text:
-        multiplier = 1000
-        followers_text = followers_text.replace('k', '')
-    elif 'm' in followers_text:
-        multiplier = 1000000
-        followers_text = followers_text.replace('m', '')
-
-    # For counts like '1,234' after removing 'k' or 'm'
-    if '.' in followers_text:
-        parts = followers_text.split('.')
-        main_part = parts[0]
-        decimal_part = parts[1]
-        # Adjust the multiplier based on the number of decimal places
-        multiplier /= 10 ** len(decimal_part)
-        followers_text = main_part + decimal_part
-
-    return int(float(followers_text) * multiplier)
-
-def get_followers_count(page, username):
-    """Gets the number of followers for a given username."""
-    profile_url = f'https://www.instagram.com/{username}/'
-    page.goto(profile_url)
-    page.wait_for_selector('header section ul li a span', state='visible')  # Adjust the selector based on the current Instagram layout
-    followers_element = page.query_selector('header section ul li a span')
-    followers_count_text = followers_element.inner_text()
-
-    # Use the helper function to parse the text to an integer
-    followers_count = parse_followers_count(followers_count_text)
-    return followers_count
-
-def get_total_likes_of_last_reels(L, username, max_reels=10):
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_likes = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_likes += post.likes
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_likes
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-        return None
-    except Exception as e:
-        print(f"An error occurred when getting total likes: {e}")
-        return None
-
-def get_total_comments_of_last_reels(L, username, max_reels=10):
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
 
-        total_comments = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_comments += post.comments
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_comments
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-        return None
-    except Exception as e:
-        print(f"An error occurred when getting total comments: {e}")
-        return None
-
-def get_total_views_of_last_reels(L, username, max_reels=10):
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_views = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_views += post.video_view_count
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_views
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-        return None
-    except Exception as e:
-        print(f"An error occurred when getting total views: {e}")
-        return None
+    # Each click outside closes the top-most modal; wait for it to detach instead of sleeping
+    for _ in range(2):
+        open_dialogs = len(page.query_selector_all('div[role="dialog"]'))
+        if not open_dialogs:
+            break
+        page.mouse.click(10, 10)
+        try:
+            page.wait_for_function(
+                "n => document.querySelectorAll('div[role=dialog]').length < n",
+                arg=open_dialogs,
+                timeout=UI_TIMEOUT,
+            )
+        except PlaywrightTimeoutError:
+            break
 
+    print("Closed 'More Options' modal.")
+    
 def calculate_engagement(total_likes, total_comments, total_views):
     """Calculates the engagement rate."""
     if total_views == 0:  # Prevent division by zero
         return 0
     return (total_likes + total_comments) / total_views
+def score_creator(pipeline, L, username):
+    """Runs a username through the pipeline; returns the filled-in candidate, or None if a stage dropped it."""
+    candidate = {'username': username}
+    return candidate if pipeline.run(candidate, state=L) else None
+
 def main():
     """Main function to run the Instagram scraper."""
     if not instagram_username or not instagram_password:
         raise ValueError("Instagram credentials are not set.")
 
-    L = instaloader.Instaloader()
-    load_session(L, instagram_username, instagram_password)  # Load or create a session
+    # Log in once; the browser and instaloader share the same cookies and request budget for the whole run
+    session = SessionManager(instagram_username, instagram_password)
+    L = session.instaloader()
+
+    sink = CsvResultSink(CSV_PATH, CSV_FIELDS)  # Opened once, rows are appended as they come
+
+    # Local checks first, then the profile fetch, and the reel walk only for creators in the follower band
+    pipeline = FilterPipeline([
+        not_blocked(load_blocklist(BLOCKLIST_PATH)),
+        followers_in_range(MIN_FOLLOWERS, MAX_FOLLOWERS),
+        with_reel_stats(calculate_engagement),
+    ])
+    # Throttled or dropped lookups wait for a later pass of the loop instead of stalling or ending the run
+    retries = RetryQueue()
 
     with sync_playwright() as p:
         browser = p.webkit.launch(headless=False)  # Set headless=False to see the browser window
-        page = browser.new_page()
-        login_to_instagram(page, instagram_username, instagram_password)
-
-        # Check for two-factor authentication (2FA) if needed
-        if page.is_visible("input[name='verificationCode']"):
-            handle_2fa(page)
+        page = session.new_browser_context(browser).new_page()  # Already logged in, no login form
 
         num_users_logged = 0
         max_users_to_log = 5  # Set to the desired number of users to log
@@ -282,26 +193,15 @@ def main():
             while num_users_logged < max_users_to_log:
                 navigate_to_reels(page)
                 username = click_more_options_and_embed(page)
-                if username:
-                    followers_count = get_followers_count(page, username)
-                    if followers_count < 10000:  # Store only if followers count is less than 10k
-                        total_likes = get_total_likes_of_last_reels(L, username)
-                        total_comments = get_total_comments_of_last_reels(L, username)
-                        total_views = get_total_views_of_last_reels(L, username)
-
-                        if total_likes is not None and total_comments is not None and total_views is not None:
-                            engagement = calculate_engagement(total_likes, total_comments, total_views)
-                            save_username_to_csv(username, followers_count, engagement, CSV_PATH)
-                            print(f"Stored {username} with {followers_count} followers and an engagement of {engagement}.")
-                            num_users_logged += 1
-                            check_login_status(page)  # Check if still logged in after storing the entry
-                        else:
-                            print(f"Could not retrieve data for {username}.")
-                    else:
-                        print(f"Skipped {username} with {followers_count} followers (10k or more).")
-                    close_options_modal(page)
-                else:
-                    close_options_modal(page)
+                lookups = retries.due() + ([(username, 0)] if username else [])
+                for username, attempt in lookups:
+                    candidate = retries.call(lambda name: score_creator(pipeline, L, name), username, attempt, session.limiter)
+                    if candidate and num_users_logged < max_users_to_log:
+                        save_username_to_csv(username, candidate['followers_count'], candidate['engagement'], sink)
+                        print(f"Stored {username} with {candidate['followers_count']} followers and an engagement of {candidate['engagement']}.")
+                        num_users_logged += 1
+                        check_login_status(page)  # Check if still logged in after storing the entry
+                close_options_modal(page)
                 scroll_to_next_reel(page)
 
         except Exception as e:
@@ -309,6 +209,9 @@ def main():
 
         finally:
             browser.close()
+            sink.close()
+            pipeline.print_stats()
+            print(f"{retries.given_up} lookups given up, {len(retries)} still waiting for a retry.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
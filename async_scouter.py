@@ -0,0 +1,355 @@
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from browser_profile import DISCOVERY_CONTEXT_OPTIONS, launch_browser, apply_discovery_profile_async
+from filters import COST_LOCAL
+from metrics import METRICS
+from rate_limiter import backoff_delay, is_throttled
+from reel_discovery import AsyncFeedHarvester
+
+REELS_URL = 'https://www.instagram.com/reels/'
+LOGIN_URL = 'https://www.instagram.com/accounts/login/'
+
+_STOP = object()
+
+
+class LoggedOut(Exception):
+    """Raised by a ReelBrowser without a session when its tab shows the login form."""
+
+
+class ReelBrowser:
+    """Drives Reels tabs with playwright.async_api: navigation, scrolling, the Embed modal and re-login.
+
+    `discover` scrolls one tab's feed and awaits `on_author(username)` for every author
+    it has not seen in that tab. In 'embed' mode, or while the feed gave nothing to
+    read, the author comes from the reel's Embed modal instead. Every navigation and
+    scroll takes a token from `limiter`. A tab found logged out logs the context back in
+    with `session` and renews the session from it; tabs logged out together log in once.
+    Without a session (a process with no terminal for the 2FA prompt) it raises LoggedOut.
+    """
+
+    def __init__(self, session, limiter, extract_username, discovery_mode='feed', max_idle_scrolls=5,
+                 ui_timeout=10000, jitter_range=(0.2, 0.8)):
+        self.session = session
+        self.limiter = limiter
+        self.extract_username = extract_username
+        self.discovery_mode = discovery_mode
+        self.max_idle_scrolls = max_idle_scrolls
+        self.ui_timeout = ui_timeout
+        self.jitter_range = jitter_range
+        self._login_lock = asyncio.Lock()
+        self._logins = 0
+
+    async def discover(self, page, on_author, stopped, label='Tab'):
+        """Scrolls the tab's Reels feed until `stopped()` returns True."""
+        harvester = AsyncFeedHarvester(page, self.limiter)
+        await self.navigate_to_reels(page)
+        await self.check_and_relogin_if_needed(page)
+        idle_scrolls = 0
+        while not stopped():
+            usernames = await harvester.harvest() if self.discovery_mode == 'feed' else []
+            if not usernames and (self.discovery_mode == 'embed' or not harvester.seen):
+                # Fall back to the Embed modal for the reel in view when the feed gave nothing to read
+                username = await self.click_more_options_and_embed(page)
+                await self.close_options_modal(page)
+                usernames = [username] if username and harvester.add(username) else []
+            for username in usernames:
+                await on_author(username)
+
+            idle_scrolls = 0 if usernames else idle_scrolls + 1
+            if idle_scrolls >= self.max_idle_scrolls:
+                print(f"{label}: no new authors after {idle_scrolls} scrolls, reloading the Reels feed.")
+                await self.navigate_to_reels(page)
+                idle_scrolls = 0
+            await self.check_and_relogin_if_needed(page)
+            await self.scroll_to_next_reel(page)
+
+    async def human_jitter(self):
+        """Short random pause between interactions so the clicks don't fire at machine speed."""
+        await asyncio.sleep(random.uniform(*self.jitter_range))
+
+    async def navigate_to_reels(self, page):
+        await self.limiter.acquire_async()
+        with METRICS.time('navigate'):
+            await page.goto(REELS_URL)
+            await page.wait_for_load_state('networkidle')
+
+    async def scroll_to_next_reel(self, page):
+        await self.limiter.acquire_async()  # Scrolling loads the next feed page
+        with METRICS.time('scroll'):
+            # Scroll a full screen so the feed snaps to the next reel instead of reloading the page
+            await page.mouse.wheel(0, await page.evaluate("window.innerHeight") + random.randint(0, 100))
+        await self.human_jitter()
+
+    async def click_more_options_and_embed(self, page, retries=3):
+        """Opens the reel's Embed modal and returns the author from its embed code, or None."""
+        with METRICS.time('modal') as timing:
+            username = await self._open_embed(page, retries)
+            if not username:
+                timing.outcome = 'skipped'
+        return username
+
+    async def _open_embed(self, page, retries):
+        for attempt in range(retries):
+            try:
+                more_options_button = await page.wait_for_selector(
+                    'svg[aria-label="More"]', state="visible", timeout=self.ui_timeout
+                )
+            except PlaywrightTimeoutError:
+                print(f"'More Options' button not found, retrying... (Attempt {attempt + 1} of {retries})")
+                await self.scroll_to_next_reel(page)
+                continue
+            await self.human_jitter()
+            await more_options_button.click()
+            try:
+                embed_button = await page.wait_for_selector('text=Embed', state="visible", timeout=self.ui_timeout)
+                await self.human_jitter()
+                await embed_button.click()
+                # Wait until the embed code textarea has been filled in
+                await page.wait_for_function(
+                    "() => { const t = document.querySelector('textarea'); return t && t.value.length > 0; }",
+                    timeout=self.ui_timeout,
+                )
+            except PlaywrightTimeoutError:
+                print("Embed code could not be opened.")
+                return None
+            embed_code = await page.input_value("textarea")
+            with METRICS.time('embed_extraction') as timing:
+                username = self.extract_username(embed_code)
+                if not username:
+                    timing.outcome = 'skipped'
+            if not username:
+                print("Username could not be extracted.")
+            return username
+        return None
+
+    async def close_options_modal(self, page):
+        """Closes the 'More Options' and 'Embed' modals by clicking outside them."""
+        with METRICS.time('modal_close'):
+            await self._close_dialogs(page)
+
+    async def _close_dialogs(self, page):
+        for _ in range(2):
+            open_dialogs = len(await page.query_selector_all('div[role="dialog"]'))
+            if not open_dialogs:
+                break
+            await page.mouse.click(10, 10)
+            try:
+                await page.wait_for_function(
+                    "n => document.querySelectorAll('div[role=dialog]').length < n",
+                    arg=open_dialogs,
+                    timeout=self.ui_timeout,
+                )
+            except PlaywrightTimeoutError:
+                break
+
+    async def login(self, page):
+        print("Logging in to Instagram...")
+        await page.goto(LOGIN_URL)
+        await page.wait_for_selector("input[name='username']", state="visible")
+        await self.human_jitter()
+        await page.fill("input[name='username']", self.session.username)
+        await page.fill("input[name='password']", self.session.password)
+        await page.click("button[type='submit']")
+        await page.wait_for_url(lambda url: not url.rstrip('/').endswith('/accounts/login'), timeout=self.ui_timeout * 3)
+        if 'two_factor' in page.url:
+            await page.wait_for_selector("input[name='verificationCode']", state="visible", timeout=self.ui_timeout)
+            # input() blocks, so it waits on a thread while the other tabs keep going
+            code = await asyncio.to_thread(input, "Enter the two-factor authentication code: ")
+            await page.fill("input[name='verificationCode']", code)
+            await page.click("button[type='submit']")
+            await page.wait_for_url(lambda url: 'two_factor' not in url, timeout=self.ui_timeout * 3)
+
+    async def check_and_relogin_if_needed(self, page):
+        """Logs back in when the tab shows the login form; tabs logged out together log in only once."""
+        if not await page.is_visible("input[name='username']"):
+            return
+        if self.session is None:
+            raise LoggedOut("the tab was logged out and has no session to log back in with")
+        logins = self._logins
+        async with self._login_lock:
+            if self._logins == logins:  # Otherwise another tab logged the shared context back in meanwhile
+                print("Detected logout, attempting to log back in...")
+                with METRICS.time('relogin'):
+                    await self.login(page)
+                    # Share the renewed login with instaloader and the next run
+                    await self.session.renew_from_browser_async(page.context)
+                self._logins += 1
+        await self.navigate_to_reels(page)
+
+
+class AsyncScouter:
+    """Scouting engine that runs on one asyncio event loop with playwright.async_api.
+
+    `num_pages` tabs of one logged-in browser context discover authors concurrently
+    through a ReelBrowser, each with its own feed session; usernames that pass the
+    local filter stages are queued for `num_workers` enrichment tasks. Profile lookups stay on instaloader,
+    which is blocking, so each task hands them to a thread holding its own
+    `worker_init()` state while the loop keeps driving the tabs. A single writer task
+    passes results to `on_result` off the loop, in the order they arrive, until
+    `target` creators are stored. Failed lookups are retried after a jittered
+    exponential backoff like EnrichmentPool does, whose counters this class shares.
+    """
+
+    def __init__(self, session, pipeline, enrich, on_result, extract_username, num_pages=2, num_workers=4,
+                 worker_init=None, engine='chromium', headless=True, block_resources=True, discovery_mode='feed',
+                 max_idle_scrolls=5, ui_timeout=10000, jitter_range=(0.2, 0.8), max_attempts=3, retry_base=30,
+                 queue_size=100):
+        self.session = session
+        self.limiter = session.limiter
+        self.pipeline = pipeline
+        self.enrich = enrich
+        self.on_result = on_result
+        self.num_pages = num_pages
+        self.num_workers = num_workers
+        self.worker_init = worker_init
+        self.engine = engine
+        self.headless = headless
+        self.block_resources = block_resources
+        self.browser = ReelBrowser(session, self.limiter, extract_username, discovery_mode, max_idle_scrolls,
+                                   ui_timeout, jitter_range)
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.queue_size = queue_size
+        self.submitted = 0
+        self.enriched = 0
+        self.failed = 0
+        self.retried = 0
+        self.stored = 0
+        self._stopping = False
+        self._local = threading.local()
+
+    async def run(self, target, pending=()):
+        """Discovers, enriches and stores creators until `target` are stored; `pending` usernames are enriched first."""
+        if target <= 0:
+            return
+        self._target = target
+        self._done = asyncio.Event()
+        self._tasks = asyncio.Queue(maxsize=self.queue_size)
+        self._results = asyncio.Queue()
+        self._retries = set()
+        self._executor = ThreadPoolExecutor(self.num_workers, thread_name_prefix='enrich')
+        workers = [asyncio.create_task(self._enrich_worker()) for _ in range(self.num_workers)]
+        writer = asyncio.create_task(self._write())
+        try:
+            for username in pending:
+                await self.submit(username)
+            await self._discover_until_done()
+        finally:
+            await self._stop(workers, writer)
+
+    async def submit(self, username):
+        """Queues a username for enrichment, waiting while the queue is full."""
+        await self._tasks.put((username, 0))
+        self.submitted += 1
+
+    async def _discover_until_done(self):
+        async with async_playwright() as p:
+            browser = await launch_browser(p, self.engine, self.headless)
+            blocker = None
+            try:
+                # The context starts logged in with the shared session; every tab shares its cookies
+                context = await self.session.new_browser_context_async(browser, **DISCOVERY_CONTEXT_OPTIONS)
+                if self.block_resources:
+                    blocker = await apply_discovery_profile_async(context)
+                pages = [asyncio.create_task(self._discover(page_id, context)) for page_id in range(self.num_pages)]
+                done = asyncio.create_task(self._done.wait())
+                discovering = asyncio.gather(*pages)
+                # Stop once the target is met, or once every tab has given up
+                await asyncio.wait([done, discovering], return_when=asyncio.FIRST_COMPLETED)
+                for task in [done, *pages]:
+                    task.cancel()
+                await asyncio.gather(done, discovering, return_exceptions=True)
+            finally:
+                if blocker is not None:
+                    print(f"Browser requests: {blocker.stats()}")
+                await browser.close()
+
+    async def _discover(self, page_id, context):
+        """Scrolls one tab's Reels feed and queues every new author that passes the local stages."""
+        page = await context.new_page()
+        try:
+            await self.browser.discover(page, self._queue_author, self._done.is_set, f"Tab {page_id}")
+        except Exception as e:
+            print(f"Tab {page_id} stopped discovering: {e}")
+        finally:
+            await page.close()
+
+    async def _queue_author(self, username):
+        # The run journal stage also keeps the tabs from queueing the same author twice; it commits
+        # to SQLite, so the local stages run off the loop
+        if await asyncio.to_thread(self.pipeline.run, {'username': username}, max_cost=COST_LOCAL):
+            await self.submit(username)
+
+    def _enrich_in_thread(self, username):
+        # Each executor thread builds its own state once, like an EnrichmentPool worker
+        if not hasattr(self._local, 'state'):
+            self._local.state = self.worker_init() if self.worker_init else None
+        return self.enrich(self._local.state, username)
+
+    async def _enrich_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            task = await self._tasks.get()
+            if task is _STOP:
+                break
+            username, attempt = task
+            try:
+                result = await loop.run_in_executor(self._executor, self._enrich_in_thread, username)
+            except Exception as e:
+                if is_throttled(e):
+                    self.limiter.on_throttle()
+                if attempt + 1 < self.max_attempts and not self._stopping:
+                    delay = backoff_delay(attempt, self.retry_base)
+                    print(f"Enriching {username} failed ({e}), retrying in {delay:.0f} seconds.")
+                    retry = asyncio.create_task(self._retry_later(username, attempt + 1, delay))
+                    self._retries.add(retry)
+                    retry.add_done_callback(self._retries.discard)
+                    self.retried += 1
+                    continue
+                print(f"An error occurred while enriching {username}, giving up after {attempt + 1} attempts: {e}")
+                result = None
+            else:
+                self.limiter.on_success()
+            if result is None:
+                self.failed += 1
+            else:
+                self.enriched += 1
+                await self._results.put(result)
+
+    async def _retry_later(self, username, attempt, delay):
+        await asyncio.sleep(delay)
+        await self._tasks.put((username, attempt))
+
+    async def _write(self):
+        while True:
+            result = await self._results.get()
+            if result is _STOP:
+                break
+            try:
+                # Sinks fsync, so writing happens off the loop; one writer keeps the arrival order
+                await asyncio.to_thread(self.on_result, result)
+                self.stored += 1
+            except Exception as e:
+                print(f"An error occurred while storing a result: {e}")
+            if self.stored >= self._target:
+                self._done.set()
+
+    async def _stop(self, workers, writer):
+        """Drops queued usernames and pending retries, lets in-flight lookups finish and stores their results."""
+        self._stopping = True
+        for retry in list(self._retries):
+            retry.cancel()
+        self.failed += len(self._retries)
+        while not self._tasks.empty():
+            self._tasks.get_nowait()
+        for _ in workers:
+            await self._tasks.put(_STOP)
+        await asyncio.gather(*workers, return_exceptions=True)
+        await self._results.put(_STOP)
+        await writer
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,68 @@
+"""Compares the embed username extractor with the old BeautifulSoup path over the saved embed snippets.
+
+    python benchmarks/embed_extraction.py [--repeat 2000] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from embed_parser import _extract_with_parser, extract_username_from_embed_code  # noqa: E402
+
+EMBEDS_DIR = os.path.join(BENCHMARK_DIR, 'fixtures', 'embeds')
+
+
+def load_corpus(directory=EMBEDS_DIR):
+    """Returns (file name, embed code, expected username) for every saved snippet."""
+    with open(os.path.join(directory, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+    corpus = []
+    for name in sorted(expected):
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            corpus.append((name, f.read(), expected[name]))
+    return corpus
+
+
+def measure(extract, corpus, repeat):
+    """Best per-snippet time in microseconds over five rounds, and how many snippets were extracted correctly."""
+    snippets = [embed_code for _, embed_code, _ in corpus]
+    rounds = timeit.repeat(lambda: [extract(embed_code) for embed_code in snippets], number=repeat, repeat=5)
+    correct = sum(extract(embed_code) == expected for _, embed_code, expected in corpus)
+    return {
+        'us_per_snippet': round(min(rounds) / (repeat * len(snippets)) * 1e6, 2),
+        'correct': correct,
+        'snippets': len(snippets),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark embed username extraction.")
+    parser.add_argument('--repeat', type=int, default=2000, help="passes over the corpus per timing round")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus()
+    results = {
+        'extract_username_from_embed_code': measure(extract_username_from_embed_code, corpus, args.repeat),
+        'beautifulsoup': measure(_extract_with_parser, corpus, max(1, args.repeat // 20)),
+    }
+    results['speedup'] = round(results['beautifulsoup']['us_per_snippet'] / results['extract_username_from_embed_code']['us_per_snippet'], 1)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name in ('extract_username_from_embed_code', 'beautifulsoup'):
+        result = results[name]
+        print(f"{name:34} {result['us_per_snippet']:9.2f} us/snippet  {result['correct']}/{result['snippets']} correct")
+    print(f"Speedup: {results['speedup']}x")
+    for name, embed_code, expected in corpus:
+        fast, parsed = extract_username_from_embed_code(embed_code), _extract_with_parser(embed_code)
+        if fast != expected or parsed != expected:
+            print(f"  {name}: expected {expected!r}, extractor {fast!r}, BeautifulSoup {parsed!r}")
+
+
+if __name__ == "__main__":
+    main()
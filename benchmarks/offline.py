@@ -0,0 +1,294 @@
+"""Offline stand-ins for Instagram: a local HTTP server with recorded pages and a recorded instaloader backend."""
+import contextlib
+import datetime
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import instaloader
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# The embed snippet every recorded reel's embed code is built from, and the values it was saved with
+EMBED_TEMPLATE = os.path.join(FIXTURES_DIR, 'embeds', 'reel_basic.html')
+EMBED_TEMPLATE_VALUES = {'username': 'maya.cooks', 'full_name': 'Maya Lopez', 'shortcode': 'C7xQ2mKvT1a'}
+
+INSTAGRAM_URL_PATTERN = re.compile(r'^https://www\.instagram\.com/')
+
+
+def load_fixtures(path=os.path.join(FIXTURES_DIR, 'creators.json')):
+    """Returns the recorded creators and the handles whose profiles are gone."""
+    with open(path, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    return fixtures['creators'], fixtures.get('missing_profiles', [])
+
+
+def build_feed(creators, missing=(), page_size=8):
+    """Orders the recorded reels like a Reels feed: round robin over creators, with the gone profiles mixed in."""
+    queues = [[post for post in creator['posts'] if post['is_video']] for creator in creators]
+    items = []
+    for depth in range(max(len(queue) for queue in queues)):
+        for creator, queue in zip(creators, queues):
+            if depth < len(queue):
+                items.append({'media': {'code': queue[depth]['shortcode'], 'user': {'username': creator['username']}}})
+        for i, username in enumerate(missing):
+            items.insert(len(items) // (i + 2), {'media': {'code': f'Cgone{depth:02d}{i:03d}', 'user': {'username': username}}})
+    pages = [items[start:start + page_size] for start in range(0, len(items), page_size)]
+    return [
+        {'items': page, 'paging_info': {'more_available': index + 1 < len(pages), 'max_id': str(index + 1)}, 'status': 'ok'}
+        for index, page in enumerate(pages)
+    ]
+
+
+class FixtureServer:
+    """Local HTTP server answering the Instagram paths the browser stages visit with recorded pages.
+
+    Serves /reels/ (a feed page that loads its items from /api/v1/clips/home/?page=N)
+    and /embed/<shortcode>/ (embed code for a recorded reel). `route_async(context)`
+    points a context's www.instagram.com requests at it. Requests are counted per kind.
+    """
+
+    def __init__(self, creators, missing=(), page_size=8, latency=0.0):
+        self.creators = {creator['username']: creator for creator in creators}
+        self.feed_pages = build_feed(creators, missing, page_size)
+        self.authors = {
+            item['media']['code']: item['media']['user']['username'] for page in self.feed_pages for item in page['items']
+        }
+        self.latency = latency
+        self.requests = {}
+        self._lock = threading.Lock()
+        with open(os.path.join(FIXTURES_DIR, 'reels.html'), encoding='utf-8') as f:
+            self.reels_page = f.read()
+        with open(EMBED_TEMPLATE, encoding='utf-8') as f:
+            self.embed_template = f.read()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def embed_code(self, shortcode):
+        username = self.authors.get(shortcode)
+        if username is None:
+            return None
+        creator = self.creators.get(username, {'full_name': username})
+        return (self.embed_template
+                .replace(EMBED_TEMPLATE_VALUES['shortcode'], shortcode)
+                .replace(EMBED_TEMPLATE_VALUES['full_name'], creator['full_name'])
+                .replace(EMBED_TEMPLATE_VALUES['username'], username))
+
+    def respond(self, path, query):
+        """Returns (status, content type, body) for a request path."""
+        if path == '/reels/':
+            return 200, 'text/html; charset=utf-8', self.reels_page
+        if path.startswith('/api/v1/clips/'):
+            page = int(query.get('page', ['0'])[0])
+            data = self.feed_pages[page] if page < len(self.feed_pages) else {
+                'items': [], 'paging_info': {'more_available': False}, 'status': 'ok'
+            }
+            return 200, 'application/json; charset=utf-8', json.dumps(data)
+        match = re.match(r'^/embed/([A-Za-z0-9_-]+)/$', path)
+        if match:
+            embed_code = self.embed_code(match.group(1))
+            if embed_code is not None:
+                return 200, 'text/plain; charset=utf-8', embed_code
+        return 404, 'text/html; charset=utf-8', "<html><body><h2>Sorry, this page isn't available.</h2></body></html>"
+
+    def _count(self, path):
+        kind = path.strip('/').split('/')[0] if path.count('/') > 2 or path == '/reels/' else 'other'
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                server._count(url.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                status, content_type, body = server.respond(url.path, urllib.parse.parse_qs(url.query))
+                body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def local_url(self, url):
+        """The address on this server answering a www.instagram.com URL, or None for any other host."""
+        if not INSTAGRAM_URL_PATTERN.match(url):
+            return None
+        url = urllib.parse.urlsplit(url)
+        return urllib.parse.urlunsplit(('http', self.url[len('http://'):], url.path, url.query, ''))
+
+    async def route_async(self, context):
+        """Answers a context's www.instagram.com requests from this server; everything else is aborted.
+
+        The context comes from playwright.async_api.
+        """
+        async def handle(route):
+            local_url = self.local_url(route.request.url)
+            if local_url is None:
+                await route.abort()
+                return
+            await route.fulfill(response=await route.fetch(url=local_url))
+
+        await context.route('**/*', handle)
+
+
+class FixtureSession:
+    """What AsyncScouter needs of a SessionManager: a limiter and browser contexts answered by a FixtureServer."""
+
+    def __init__(self, server, limiter):
+        self.server = server
+        self.limiter = limiter
+
+    async def new_browser_context_async(self, browser, **context_options):
+        context = await browser.new_context(**context_options)
+        await self.server.route_async(context)
+        return context
+
+
+class RecordedPost:
+    """The Post attributes the reel walks read, from a recorded post.
+
+    Like a post built from a logged-in feed page, the comment count sits in `_node`;
+    reading `comments` fetches the post's metadata, one 'post' request to the backend.
+    """
+
+    def __init__(self, backend, node, owner):
+        self._backend = backend
+        self._node = {'comments': node['comments']}
+        self.shortcode = node['shortcode']
+        self.is_video = node['is_video']
+        self.is_pinned = node.get('is_pinned', False)
+        self.date_utc = datetime.datetime.strptime(node['taken_at'], '%Y-%m-%dT%H:%M:%S')
+        self.likes = node['likes']
+        self.video_view_count = node['views'] if node['is_video'] else None
+        self.owner_username = owner
+
+    @property
+    def comments(self):
+        self._backend.request('post')
+        return self._node['comments']
+
+
+class RecordedPostIterator:
+    """Pages through recorded posts like instaloader's NodeIterator on a logged-in session.
+
+    Every page, the first included, is one 'posts' request to the backend; the first is
+    made when the iterator is created. `_data` and `_page_index` mirror NodeIterator's,
+    which the incremental refresh looks at to avoid fetching a page it does not need.
+    """
+
+    def __init__(self, backend, username, posts, page_size):
+        self._backend = backend
+        self._username = username
+        self._posts = posts
+        self._page_size = page_size
+        self._offset = 0
+        self._data = self._page(0)
+        self._page_index = 0
+
+    def _page(self, offset):
+        self._backend.request('posts')
+        return {'edges': [{'node': node} for node in self._posts[offset:offset + self._page_size]]}
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._page_index < len(self._data['edges']):
+            node = self._data['edges'][self._page_index]['node']
+            self._page_index += 1
+            return RecordedPost(self._backend, node, self._username)
+        if self._offset + self._page_size >= len(self._posts):
+            raise StopIteration
+        self._offset += self._page_size
+        self._data = self._page(self._offset)
+        self._page_index = 0
+        return next(self)
+
+
+class RecordedProfile:
+    def __init__(self, backend, creator):
+        self._backend = backend
+        self.username = creator['username']
+        self.full_name = creator['full_name']
+        self.followers = creator['followers']
+        self.mediacount = len(creator['posts'])
+        self._posts = creator['posts']
+
+    def get_posts(self):
+        return RecordedPostIterator(self._backend, self.username, self._posts, self._backend.page_size)
+
+
+class RecordedBackend:
+    """Stands in for instaloader's context: answers profile and post queries from recorded creators.
+
+    Every query sleeps `latency` seconds, the way a network round trip would, and is
+    counted per kind. Profiles listed as missing raise ProfileNotExistsException like
+    instaloader does for deleted accounts.
+    """
+
+    def __init__(self, creators, missing=(), latency=0.0, page_size=12):
+        self.creators = {creator['username']: creator for creator in creators}
+        self.missing = set(missing)
+        self.latency = latency
+        self.page_size = page_size
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def request(self, kind):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def profile(self, username):
+        self.request('profile')
+        creator = self.creators.get(username)
+        if creator is None:
+            raise instaloader.exceptions.ProfileNotExistsException(f"Profile {username} does not exist.")
+        return RecordedProfile(self, creator)
+
+
+class RecordedInstaloader:
+    """What enrichment code gets instead of an Instaloader: only `context` is used, through Profile.from_username."""
+
+    def __init__(self, backend):
+        self.context = backend
+
+
+@contextlib.contextmanager
+def recorded_instaloader(backend):
+    """Makes instaloader.Profile.from_username answer from `backend` while the block runs."""
+    from_username = instaloader.Profile.__dict__['from_username']
+    instaloader.Profile.from_username = staticmethod(lambda context, username: backend.profile(username))
+    try:
+        yield RecordedInstaloader(backend)
+    finally:
+        instaloader.Profile.from_username = from_username
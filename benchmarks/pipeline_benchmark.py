@@ -0,0 +1,316 @@
+"""Runs the real discovery and enrichment code against recorded data and reports per-stage numbers as JSON.
+
+    python benchmarks/pipeline_benchmark.py [--latency 0.02] [--workers 4] [--reels 40] [--target 20] [--output bench.json]
+
+Enrichment stages run against a recorded instaloader backend, browser stages against a
+local server serving recorded Reels, embed and profile pages. The browser stages step
+one tab through the feed with ReelBrowser, then a whole AsyncScouter run stores
+`--target` creators from both. Every stage reports its
+calls, latency percentiles, CPU seconds of this process and calls per minute; memory is
+the process's peak RSS after each group of stages, plus traced Python allocations with
+--trace-memory (which slows the stages down). Browser stages are reported as skipped
+when no Playwright browser can be launched.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import instaloader  # noqa: E402
+
+import AI_scouter  # noqa: E402
+from async_scouter import AsyncScouter, ReelBrowser  # noqa: E402
+from browser_profile import DISCOVERY_CONTEXT_OPTIONS, QUIET_MEDIA_SCRIPT, launch_browser  # noqa: E402
+from embed_parser import extract_username_from_embed_code  # noqa: E402
+from enrichment import EnrichmentPool  # noqa: E402
+from filters import FilterPipeline, followers_in_range, new_in_run, with_reel_stats  # noqa: E402
+from offline import (  # noqa: E402
+    FixtureServer, FixtureSession, RecordedBackend, RecordedInstaloader, load_fixtures, recorded_instaloader,
+)
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from reel_discovery import AsyncFeedHarvester, find_media_authors  # noqa: E402
+from reel_stats import get_reel_stats_of_last_reels, load_profile, refresh_reel_stats  # noqa: E402
+from run_journal import RunJournal  # noqa: E402
+
+
+class StageRecorder:
+    """Collects wall time per call and process CPU time per stage; safe to use from worker threads."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.cpu = defaultdict(float)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.memory = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            elapsed, cpu_used = time.perf_counter() - wall, time.process_time() - cpu
+            with self._lock:
+                self.samples[stage].append(elapsed)
+                self.cpu[stage] += cpu_used
+
+    def count(self, stage, outcome):
+        with self._lock:
+            self.outcomes[stage][outcome] += 1
+
+    def summary(self):
+        stages = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            total = sum(ordered)
+            stages[stage] = {
+                'calls': len(ordered),
+                'total_seconds': round(total, 4),
+                'mean_ms': round(total / len(ordered) * 1000, 3),
+                'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3),
+                'cpu_seconds': round(self.cpu[stage], 4),
+                'per_minute': round(len(ordered) / total * 60, 1) if total else None,
+            }
+            if stage in self.outcomes:
+                stages[stage]['outcomes'] = dict(self.outcomes[stage])
+        return stages
+
+
+@contextlib.contextmanager
+def stage_group(recorder, name, trace_memory):
+    """Records the peak RSS after a group of stages and, with tracing on, the peak of Python allocations during it."""
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        memory = {'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+        if trace_memory:
+            memory['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+        recorder.memory[name] = memory
+
+
+def bench_parsing(recorder, server):
+    """Feed JSON decoding and embed extraction: pure CPU, no waiting."""
+    for page in server.feed_pages:
+        with recorder.time('feed_parsing'):
+            find_media_authors(json.loads(json.dumps(page)))
+    for shortcode, username in server.authors.items():
+        embed_code = server.embed_code(shortcode)
+        with recorder.time('embed_extraction'):
+            extracted = extract_username_from_embed_code(embed_code)
+        recorder.count('embed_extraction', 'correct' if extracted == username else 'wrong')
+
+
+def bench_enrichment(recorder, backend, usernames, workers):
+    """Profile lookups, reel walks and refreshes one by one, then the whole enrichment through an EnrichmentPool."""
+    pipeline = FilterPipeline([
+        followers_in_range(0, None),
+        with_reel_stats(AI_scouter.calculate_engagement),
+    ])
+    with recorded_instaloader(backend) as L:
+        previous = {}
+        for username in usernames:
+            with recorder.time('load_profile'):
+                profile = load_profile(L, username)
+            recorder.count('load_profile', 'found' if profile else 'missing')
+            if profile is None:
+                continue
+            with recorder.time('reel_walk'):
+                reel_stats = get_reel_stats_of_last_reels(L, username, profile=profile)
+            previous[username] = reel_stats['reels']
+        for username, reels in previous.items():
+            with recorder.time('reel_refresh'):
+                refresh_reel_stats(L, username, reels)
+        for username in usernames:
+            with recorder.time('enrich'):
+                result = AI_scouter.enrich_username(L, username, pipeline)
+            recorder.count('enrich', 'scored' if result else 'skipped')
+
+        def enrich(worker_L, username):
+            with recorder.time('pool_enrich'):
+                return AI_scouter.enrich_username(worker_L, username, pipeline)
+
+        stored = []
+
+        def store(result):
+            stored.append(result)
+            finished[0] = time.perf_counter()
+
+        # Timed to the last stored result; stop(drain=True) only polls for an empty pool once a second
+        started = time.perf_counter()
+        finished = [started]
+        pool = EnrichmentPool(enrich, store, num_workers=workers, worker_init=lambda: RecordedInstaloader(backend))
+        for username in usernames:
+            pool.submit(username)
+        pool.stop(drain=True)
+        elapsed = finished[0] - started
+    return {
+        'workers': workers,
+        'creators': len(usernames),
+        'stored': len(stored),
+        'wall_seconds': round(elapsed, 3),
+        'creators_per_minute': round(len(usernames) / elapsed * 60, 1),
+    }
+
+
+def bench_browser(recorder, server, engine, reels):
+    """Steps one tab through the recorded Reels feed with the ReelBrowser the discovery tabs and shards use."""
+    return asyncio.run(_bench_browser(recorder, server, engine, reels))
+
+
+async def _bench_browser(recorder, server, engine, reels):
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        try:
+            browser = await launch_browser(p, engine, headless=True)
+        except Exception as e:
+            return f"could not launch {engine}: {str(e).splitlines()[0]}"
+        try:
+            context = await browser.new_context(**DISCOVERY_CONTEXT_OPTIONS)
+            await context.add_init_script(QUIET_MEDIA_SCRIPT)
+            await server.route_async(context)
+            page = await context.new_page()
+            # The human-like pauses and the request pacing would dominate every number
+            tab = ReelBrowser(None, AdaptiveRateLimiter(rate=1000, max_rate=1000, burst=1000),
+                              extract_username_from_embed_code, jitter_range=(0, 0))
+            harvester = AsyncFeedHarvester(page)
+            with recorder.time('navigate'):
+                await tab.navigate_to_reels(page)
+            for _ in range(reels):
+                with recorder.time('reel'):
+                    with recorder.time('harvest'):
+                        await harvester.harvest()
+                    with recorder.time('embed'):
+                        username = await tab.click_more_options_and_embed(page)
+                    recorder.count('embed', 'found' if username else 'missed')
+                    with recorder.time('close_modal'):
+                        await tab.close_options_modal(page)
+                    with recorder.time('scroll'):
+                        await tab.scroll_to_next_reel(page)
+        finally:
+            await browser.close()
+    return None
+
+
+def bench_scouter(server, backend, engine, target, workers):
+    """The whole single-process engine: AsyncScouter tabs scroll the recorded feed and enrich from the recorded backend."""
+    journal = RunJournal(':memory:')  # De-duplicates the authors the tabs find, as in a real run
+    pipeline = FilterPipeline([
+        new_in_run(journal),
+        followers_in_range(0, None),
+        with_reel_stats(AI_scouter.calculate_engagement),
+    ])
+    stored = []
+    limiter = AdaptiveRateLimiter(rate=1000, max_rate=1000, burst=1000)
+    with recorded_instaloader(backend):
+        scouter = AsyncScouter(
+            FixtureSession(server, limiter),
+            pipeline,
+            lambda worker_L, username: AI_scouter.enrich_username(worker_L, username, pipeline),
+            stored.append,
+            extract_username_from_embed_code,
+            num_workers=workers,
+            worker_init=lambda: RecordedInstaloader(backend),
+            engine=engine,
+            block_resources=False,  # Its routes would take over from the fixture server's
+            jitter_range=(0, 0),
+        )
+        started = time.perf_counter()
+        try:
+            asyncio.run(asyncio.wait_for(scouter.run(target), timeout=300))
+        except Exception as e:
+            return None, f"scouter did not finish: {str(e).splitlines()[0] if str(e) else type(e).__name__}"
+        finally:
+            journal.close()
+        elapsed = time.perf_counter() - started
+    return {
+        'pages': scouter.num_pages,
+        'workers': workers,
+        'target': target,
+        'submitted': scouter.submitted,
+        'stored': len(stored),
+        'wall_seconds': round(elapsed, 3),
+        'creators_per_minute': round(len(stored) / elapsed * 60, 1),
+    }, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline against recorded data.")
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds each recorded backend or server request takes")
+    parser.add_argument('--workers', type=int, default=AI_scouter.num_enrichment_workers, help="enrichment pool threads")
+    parser.add_argument('--reels', type=int, default=40, help="reels to step through in the browser")
+    parser.add_argument('--target', type=int, default=20, help="creators the whole scouter run stores before it stops")
+    parser.add_argument('--engine', default=AI_scouter.browser_engine, help="browser engine for the browser stages")
+    parser.add_argument('--skip-browser', action='store_true', help="only run the stages that need no browser")
+    parser.add_argument('--trace-memory', action='store_true', help="also trace Python allocations per group of stages")
+    parser.add_argument('--output', help="file to write the JSON report to instead of stdout")
+    args = parser.parse_args(argv)
+
+    creators, missing = load_fixtures()
+    usernames = [creator['username'] for creator in creators] + list(missing)
+    backend = RecordedBackend(creators, missing, latency=args.latency)
+    recorder = StageRecorder()
+
+    report = {
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'instaloader': instaloader.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'config': vars(args),
+        'fixtures': {'creators': len(creators), 'missing_profiles': len(missing)},
+    }
+    with FixtureServer(creators, missing, latency=args.latency) as server, contextlib.redirect_stdout(io.StringIO()):
+        with stage_group(recorder, 'parsing', args.trace_memory):
+            bench_parsing(recorder, server)
+        with stage_group(recorder, 'enrichment', args.trace_memory):
+            report['enrichment_pool'] = bench_enrichment(recorder, backend, usernames, args.workers)
+        report['skipped'] = {}
+        if args.skip_browser:
+            report['skipped']['browser'] = "--skip-browser"
+        else:
+            with stage_group(recorder, 'browser', args.trace_memory):
+                reason = bench_browser(recorder, server, args.engine, args.reels)
+            if reason:
+                report['skipped']['browser'] = reason
+            else:
+                with stage_group(recorder, 'scouter', args.trace_memory):
+                    report['scouter'], reason = bench_scouter(
+                        server, backend, args.engine, min(args.target, len(creators)), args.workers
+                    )
+                if reason:
+                    report['skipped']['scouter'] = reason
+        report['requests'] = {'backend': backend.requests, 'server': server.requests}
+    report['stages'] = recorder.summary()
+    report['memory'] = recorder.memory
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Benchmark report saved to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
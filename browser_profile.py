@@ -0,0 +1,96 @@
+import re
+from collections import Counter
+
+ENGINES = ('chromium', 'webkit', 'firefox')
+
+# Requests the discovery tab never needs: it only reads author handles from feed JSON
+BLOCKED_RESOURCE_TYPES = {'media', 'font', 'image'}
+VIDEO_SEGMENT_PATTERN = re.compile(r'\.mp4|bytestart=|/o1/v/|/v/t16/|/v/t50\.')
+ANALYTICS_PATTERN = re.compile(
+    r'/logging_client_events|/ajax/bz|/ajax/logging|graph\.instagram\.com/logging|/falco|'
+    r'facebook\.com/tr|connect\.facebook\.net|google-analytics\.com|googletagmanager\.com'
+)
+
+# Browser context options for a light tab; service workers are blocked so every request goes through routing
+DISCOVERY_CONTEXT_OPTIONS = {
+    'service_workers': 'block',
+    'reduced_motion': 'reduce',
+    'viewport': {'width': 720, 'height': 1000},
+}
+
+# Mutes and pauses every audio/video element and refuses playback, including elements added later
+QUIET_MEDIA_SCRIPT = """
+(() => {
+    const quiet = media => {
+        media.muted = true;
+        media.autoplay = false;
+        media.preload = 'none';
+        if (!media.paused) media.pause();
+    };
+    HTMLMediaElement.prototype.play = function () { quiet(this); return Promise.resolve(); };
+    new MutationObserver(() => document.querySelectorAll('video, audio').forEach(quiet))
+        .observe(document, {childList: true, subtree: true});
+})();
+"""
+
+
+def launch_browser(playwright, engine='chromium', headless=True):
+    """Launches the chosen engine with its media autoplay and audio turned off."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown browser engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    browser_type = getattr(playwright, engine)
+    if engine == 'chromium':
+        return browser_type.launch(headless=headless, args=[
+            '--mute-audio', '--autoplay-policy=user-gesture-required', '--disable-background-networking',
+        ])
+    if engine == 'firefox':
+        return browser_type.launch(headless=headless, firefox_user_prefs={
+            'media.autoplay.default': 5,  # Block all autoplay
+            'media.volume_scale': '0.0',
+        })
+    return browser_type.launch(headless=headless)
+
+
+class ResourceBlocker:
+    """Playwright route handler that aborts video segments, images, fonts and analytics beacons.
+
+    Everything else, including the feed's JSON requests, continues untouched. Aborted
+    requests are counted per reason so a run can report what it saved.
+    """
+
+    def __init__(self):
+        self.blocked = Counter()
+        self.allowed = 0
+
+    def reason(self, request):
+        if VIDEO_SEGMENT_PATTERN.search(request.url):
+            return 'video'
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return request.resource_type
+        if ANALYTICS_PATTERN.search(request.url):
+            return 'analytics'
+        return None
+
+    async def route_async(self, route):
+        """Handles one route of a context from playwright.async_api."""
+        reason = self.reason(route.request)
+        if reason is None:
+            self.allowed += 1
+            await route.continue_()
+        else:
+            self.blocked[reason] += 1
+            await route.abort()
+
+    def stats(self):
+        return {'allowed': self.allowed, 'blocked': dict(self.blocked)}
+
+
+async def apply_discovery_profile_async(context):
+    """Routes the context's requests through a ResourceBlocker and keeps its media silent; returns the blocker.
+
+    The context comes from playwright.async_api.
+    """
+    blocker = ResourceBlocker()
+    await context.route('**/*', blocker.route_async)
+    await context.add_init_script(QUIET_MEDIA_SCRIPT)
+    return blocker
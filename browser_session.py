@@ -0,0 +1,45 @@
+import json
+import os
+import time
+
+# Cookie that carries an authenticated Instagram session
+SESSION_COOKIE = 'sessionid'
+
+
+def load_storage_state(path):
+    """Returns the saved Playwright storage state if its Instagram session cookie is still valid, else None.
+
+    This is a local check on the file only, so an expired or missing state is detected
+    without a page load.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable storage state {path}: {e}")
+        return None
+
+    now = time.time()
+    for cookie in state.get('cookies', []):
+        if cookie.get('name') == SESSION_COOKIE and 'instagram.com' in cookie.get('domain', ''):
+            expires = cookie.get('expires', -1)
+            # -1 marks a session cookie without an expiry date
+            if expires == -1 or expires > now:
+                return state
+    return None
+
+
+def save_storage_state(context, path):
+    """Writes the context's cookies and localStorage to `path` atomically, readable by the owner only."""
+    write_storage_state(context.storage_state(), path)
+
+
+def write_storage_state(state, path):
+    """Writes a storage state dict (e.g. awaited from an async context) to `path`; see save_storage_state."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
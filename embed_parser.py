@@ -0,0 +1,45 @@
+import html
+import re
+
+from reel_discovery import is_valid_username
+
+# Caption link of Instagram's embed code: "A post shared by Display Name (@handle)"
+SHARED_BY_PATTERN = re.compile(r'A post shared by[^<]*?\(@([A-Za-z0-9._]{1,30})\)')
+# Profile links some embed variants carry in the header, e.g. href="https://www.instagram.com/handle/?utm_source=ig_embed"
+PROFILE_LINK_PATTERN = re.compile(
+    r'(?:href|data-instgrm-permalink)="https?://(?:www\.)?instagram\.com/([A-Za-z0-9._]{1,30})/?(?:[?#"])'
+)
+
+
+def _extract_with_parser(embed_code):
+    """Reads the caption link with BeautifulSoup, as the scripts did before; only used when the patterns miss."""
+    from bs4 import BeautifulSoup  # Parsing a whole tree is the slow path, so bs4 is only loaded when needed
+    soup = BeautifulSoup(embed_code, "html.parser")
+    a_tag = soup.find("a", string=lambda text: "A post shared by" in text if text else False)
+    if not a_tag:
+        return None
+    text_content = a_tag.get_text(strip=True)
+    return text_content.split('@')[-1].split(')')[0].strip()
+
+
+def extract_username_from_embed_code(embed_code):
+    """Extracts the Instagram username from the embed code, or returns None.
+
+    The caption link is matched with a precompiled pattern over the raw string, then any
+    profile link in the attributes; only when both miss is the snippet parsed. Whatever
+    is found must be a valid handle that is not an Instagram page like /reel/.
+    """
+    if not embed_code:
+        return None
+    match = SHARED_BY_PATTERN.search(embed_code)
+    if match is None and '&' in embed_code:
+        match = SHARED_BY_PATTERN.search(html.unescape(embed_code))  # Entity-encoded snippets
+    if match is not None and is_valid_username(match.group(1)):
+        return match.group(1)
+    for match in PROFILE_LINK_PATTERN.finditer(embed_code):
+        if is_valid_username(match.group(1)):
+            return match.group(1)
+    if 'A post shared by' not in embed_code:
+        return None  # The parser looks for the same caption, so it would miss too
+    username = _extract_with_parser(embed_code)
+    return username if is_valid_username(username) else None
@@ -0,0 +1,169 @@
+import argparse
+import json
+import sqlite3
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Engagement definitions the batch scorer knows; every one is computed for all creators at once
+FORMULAS = {
+    'views': "(likes + comments) / views over the last reels, as calculate_engagement scores it",
+    'followers': "(likes + comments) / followers * 100 over the last reels, as engagementratecalculator scores it",
+    'median_views': "median of the per-reel (likes + comments) / views, robust to one viral reel",
+    'recency_weighted': "(likes + comments) / views with each older reel weighted by recency_decay",
+    'per_reel_followers': "mean (likes + comments) per reel / followers * 100, fair to creators with few reels",
+}
+
+
+def _safe_divide(numerator, denominator):
+    """Elementwise division that yields 0 wherever the denominator is 0 or missing."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _as_reel_matrix(values):
+    """Reads creators x reels values (newest reel first, NaN past a creator's last reel); 1-D totals become one column."""
+    values = np.asarray(values, dtype=float)
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+def score_batch(likes, comments, views, followers, formulas=None, recency_decay=0.8, usernames=None):
+    """Scores many creators at once and returns a frame with one column per formula.
+
+    `likes`, `comments` and `views` are creators x reels arrays, newest reel first and NaN
+    where a creator has fewer reels; plain per-creator totals are accepted too, in which
+    case the per-reel formulas see a single "reel". `followers` has one value per creator.
+    Zero or missing denominators score 0 instead of raising or producing inf.
+    """
+    likes, comments, views = _as_reel_matrix(likes), _as_reel_matrix(comments), _as_reel_matrix(views)
+    followers = np.asarray(followers, dtype=float)
+    formulas = list(formulas or FORMULAS)
+    unknown = set(formulas) - set(FORMULAS)
+    if unknown:
+        raise ValueError(f"Unknown engagement formulas: {', '.join(sorted(unknown))}")
+
+    present = ~np.isnan(views)
+    interactions = np.nan_to_num(likes) + np.nan_to_num(comments)
+    total_interactions = interactions.sum(axis=1)
+    total_views = np.nan_to_num(views).sum(axis=1)
+    reel_count = present.sum(axis=1)
+
+    frame = pd.DataFrame({
+        'followers_count': followers,
+        'likes': np.nan_to_num(likes).sum(axis=1),
+        'comments': np.nan_to_num(comments).sum(axis=1),
+        'views': total_views,
+        'reel_count': reel_count,
+    }, index=pd.Index(usernames, name='username') if usernames is not None else None)
+
+    if 'views' in formulas:
+        frame['engagement_views'] = _safe_divide(total_interactions, total_views)
+    if 'followers' in formulas:
+        frame['engagement_followers'] = _safe_divide(total_interactions, followers) * 100
+    if 'median_views' in formulas:
+        per_reel = np.where(present, _safe_divide(interactions, views), np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # Creators without reels: all-NaN rows
+            frame['engagement_median_views'] = np.nan_to_num(np.nanmedian(per_reel, axis=1))
+    if 'recency_weighted' in formulas:
+        weights = recency_decay ** np.arange(views.shape[1]) * present
+        frame['engagement_recency_weighted'] = _safe_divide(
+            (interactions * weights).sum(axis=1), (np.nan_to_num(views) * weights).sum(axis=1)
+        )
+    if 'per_reel_followers' in formulas:
+        frame['engagement_per_reel_followers'] = _safe_divide(_safe_divide(total_interactions, reel_count), followers) * 100
+    return frame
+
+
+def reel_columns(reel_stats_list, max_reels=10):
+    """Turns reel_stats dicts (as get_reel_stats_of_last_reels returns them) into creators x reels arrays."""
+    shape = (len(reel_stats_list), max_reels)
+    likes, comments, views = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+    for row, reel_stats in enumerate(reel_stats_list):
+        reels = reel_stats.get('reels', [])[:max_reels]
+        if reels:
+            likes[row, :len(reels)] = [reel['likes'] for reel in reels]
+            comments[row, :len(reels)] = [reel['comments'] for reel in reels]
+            views[row, :len(reels)] = [reel['views'] for reel in reels]
+        elif reel_stats.get('reel_count'):
+            # Aggregates without the per-reel list count as one reel
+            likes[row, 0], comments[row, 0], views[row, 0] = reel_stats['likes'], reel_stats['comments'], reel_stats['views']
+    return likes, comments, views
+
+
+def load_cached_pool(db_path, max_reels=10):
+    """Reads every creator with both a follower count and reel stats from the scout cache database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT username, followers_count, reel_stats FROM creators "
+            "WHERE followers_count IS NOT NULL AND reel_stats IS NOT NULL"
+        ).fetchall()
+    finally:
+        conn.close()
+    usernames = [row[0] for row in rows]
+    followers = np.array([row[1] for row in rows], dtype=float)
+    likes, comments, views = reel_columns([json.loads(row[2]) for row in rows], max_reels)
+    return usernames, likes, comments, views, followers
+
+
+def load_stored_pool(root, since=None):
+    """Reads the latest stored totals per creator from the Parquet result store, optionally from a day on."""
+    from parquet_store import read_results  # pyarrow is only needed for the Parquet store
+    frame = read_results(
+        root,
+        columns=['username', 'followers_count', 'likes', 'comments', 'views', 'scored_at'],
+        filters=[('day', '>=', since)] if since else None,
+    )
+    frame = frame.sort_values('scored_at').drop_duplicates('username', keep='last')
+    # Only totals are stored, so the per-reel formulas treat them as a single reel
+    return (
+        frame['username'].tolist(), frame['likes'].to_numpy(dtype=float), frame['comments'].to_numpy(dtype=float),
+        frame['views'].to_numpy(dtype=float), frame['followers_count'].to_numpy(dtype=float),
+    )
+
+
+def rank(frame, formula, top_n=None):
+    """Returns the frame sorted by one formula's score, best first."""
+    column = f'engagement_{formula}'
+    if top_n:
+        return frame.nlargest(top_n, column)
+    return frame.sort_values(column, ascending=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-rank the cached or stored creators under another engagement formula.")
+    parser.add_argument('--db', default='scout_cache.db', help="scout cache database to read creators from")
+    parser.add_argument('--results', help="Parquet result store to read creators from instead of the cache")
+    parser.add_argument('--since', help="with --results, only creators stored from this day on (YYYY-MM-DD)")
+    parser.add_argument('--formula', default='views', choices=sorted(FORMULAS), help="engagement formula to rank by")
+    parser.add_argument('--top', type=int, default=20, help="number of creators to show")
+    parser.add_argument('--recency-decay', type=float, default=0.8, help="weight of each older reel for recency_weighted")
+    parser.add_argument('--output', help="CSV file to write the full ranking to")
+    args = parser.parse_args(argv)
+
+    start_time = time.time()
+    if args.results:
+        usernames, likes, comments, views, followers = load_stored_pool(args.results, args.since)
+    else:
+        usernames, likes, comments, views, followers = load_cached_pool(args.db)
+    loaded_time = time.time()
+    frame = score_batch(likes, comments, views, followers, recency_decay=args.recency_decay, usernames=usernames)
+    ranked = rank(frame, args.formula)
+    scored_time = time.time()
+
+    print(f"Loaded {len(usernames)} creators in {loaded_time - start_time:.2f} seconds, "
+          f"scored and ranked them in {scored_time - loaded_time:.2f} seconds.")
+    print(ranked.head(args.top).to_string())
+    if args.output:
+        ranked.to_csv(args.output)
+        print(f"Ranking saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import heapq
+import queue
+import threading
+import time
+
+from rate_limiter import backoff_delay, is_throttled
+
+_STOP = object()
+
+
+class EnrichmentPool:
+    """Enriches discovered usernames on a pool of worker threads, decoupled from discovery.
+
+    The browsing loop calls `submit(username)`, which blocks only while the bounded
+    queue is full. Each worker builds its own state with `worker_init()` (for example
+    an Instaloader with the session loaded), calls `enrich(state, username)` and hands
+    non-None results to a single writer thread that calls `on_result(result)` in the
+    order results arrive. Request pacing is left to the shared `limiter`; an enrichment
+    that raises is requeued after a jittered exponential backoff, up to `max_attempts`
+    times, instead of being dropped.
+    """
+
+    def __init__(self, enrich, on_result, num_workers=4, queue_size=100, worker_init=None, limiter=None,
+                 max_attempts=3, retry_base=30):
+        self.enrich = enrich
+        self.on_result = on_result
+        self.num_workers = num_workers
+        self.worker_init = worker_init
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.submitted = 0
+        self.enriched = 0
+        self.failed = 0
+        self.retried = 0
+        self.stored = 0
+        self._stopped = False
+        self._in_flight = 0
+        self._tasks = queue.Queue(maxsize=queue_size)
+        self._retries = []  # Heap of (due time, attempt, username)
+        self._results = queue.Queue()
+        self._counter_lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"enrich-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        self._writer = threading.Thread(target=self._write, name="enrich-writer", daemon=True)
+        for worker in self._workers:
+            worker.start()
+        self._writer.start()
+
+    def submit(self, username):
+        """Queues a username for enrichment, blocking while the queue is full."""
+        self._tasks.put((username, 0))
+        self.submitted += 1
+
+    def pending(self):
+        """Usernames queued, waiting for a retry or being enriched right now."""
+        with self._counter_lock:
+            return self._tasks.qsize() + len(self._retries) + self._in_flight
+
+    def _next_task(self):
+        # Retries that are due go before new usernames so a backlog of retries cannot starve
+        while True:
+            with self._counter_lock:
+                if self._retries and self._retries[0][0] <= time.monotonic():
+                    _, attempt, username = heapq.heappop(self._retries)
+                    self._in_flight += 1
+                    return username, attempt
+            try:
+                task = self._tasks.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if task is not _STOP:
+                with self._counter_lock:
+                    self._in_flight += 1
+            return task
+
+    def _work(self):
+        state = self.worker_init() if self.worker_init else None
+        while True:
+            task = self._next_task()
+            if task is _STOP:
+                break
+            username, attempt = task
+            try:
+                result = self.enrich(state, username)
+            except Exception as e:
+                result = None
+                if self.limiter is not None and is_throttled(e):
+                    self.limiter.on_throttle()
+                if attempt + 1 < self.max_attempts and not self._stopped:
+                    delay = backoff_delay(attempt, self.retry_base)
+                    print(f"Enriching {username} failed ({e}), retrying in {delay:.0f} seconds.")
+                    with self._counter_lock:
+                        heapq.heappush(self._retries, (time.monotonic() + delay, attempt + 1, username))
+                        self.retried += 1
+                        self._in_flight -= 1
+                    continue
+                print(f"An error occurred while enriching {username}, giving up after {attempt + 1} attempts: {e}")
+            else:
+                if self.limiter is not None:
+                    self.limiter.on_success()
+            with self._counter_lock:
+                self._in_flight -= 1
+                if result is None:
+                    self.failed += 1
+                else:
+                    self.enriched += 1
+            if result is not None:
+                self._results.put(result)
+
+    def _write(self):
+        while True:
+            result = self._results.get()
+            if result is _STOP:
+                break
+            try:
+                self.on_result(result)
+                self.stored += 1
+            except Exception as e:
+                print(f"An error occurred while storing a result: {e}")
+
+    def stop(self, drain=False):
+        """Stops the workers and the writer.
+
+        With `drain=True` every queued username, retries included, is enriched first;
+        otherwise queued usernames and pending retries are dropped and only in-flight
+        enrichments are allowed to finish.
+        """
+        if self._stopped:
+            return
+        if drain:
+            while self.pending():
+                time.sleep(1.0)
+        self._stopped = True
+        try:
+            while True:
+                self._tasks.get_nowait()
+        except queue.Empty:
+            pass
+        with self._counter_lock:
+            self.failed += len(self._retries)
+            self._retries.clear()
+        for _ in self._workers:
+            self._tasks.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        self._results.put(_STOP)
+        self._writer.join()
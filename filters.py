@@ -0,0 +1,141 @@
+import os
+import threading
+
+from metrics import METRICS
+from reel_stats import get_reel_stats_of_last_reels, load_profile
+
+# Cost hints: stages run cheapest first, so network work is only spent on survivors
+COST_LOCAL = 0  # In-memory checks, no network
+COST_PROFILE = 1  # One profile-metadata request
+COST_REELS = 10  # Paginated walk over the profile's posts
+
+
+class Stage:
+    """One named step of the candidate pipeline.
+
+    `check(candidate, state)` returns True to keep the candidate; it may also add
+    fields to the candidate dict for later stages. `state` is whatever the caller
+    passes to `FilterPipeline.run`, e.g. the worker's Instaloader.
+    """
+
+    def __init__(self, name, check, cost=COST_LOCAL):
+        self.name = name
+        self.check = check
+        self.cost = cost
+        self.checked = 0
+        self.dropped = 0
+
+
+class FilterPipeline:
+    """Ordered filter/enrichment pipeline with per-stage counters.
+
+    Stages are sorted by cost hint (stable, so stages of equal cost keep their
+    declared order). `run` can be limited to a cost range, which lets the local
+    checks run in the discovery loop and the network stages on enrichment workers.
+    Every check is timed into `metrics` under the stage's name, a dropped candidate
+    counting as skipped.
+    """
+
+    def __init__(self, stages, metrics=METRICS):
+        self.stages = sorted(stages, key=lambda stage: stage.cost)
+        self.metrics = metrics
+        self._lock = threading.Lock()
+
+    def run(self, candidate, state=None, min_cost=None, max_cost=None):
+        """Runs the candidate through the stages in the cost range; returns False as soon as one drops it."""
+        for stage in self.stages:
+            if (min_cost is not None and stage.cost < min_cost) or (max_cost is not None and stage.cost > max_cost):
+                continue
+            with self._lock:
+                stage.checked += 1
+            with self.metrics.time(stage.name) as timing:
+                kept = stage.check(candidate, state)
+                if not kept:
+                    timing.outcome = 'skipped'
+            if not kept:
+                with self._lock:
+                    stage.dropped += 1
+                return False
+        return True
+
+    def stats(self):
+        """Returns (name, checked, dropped) for every stage in run order."""
+        with self._lock:
+            return [(stage.name, stage.checked, stage.dropped) for stage in self.stages]
+
+    def print_stats(self):
+        print("Filter pipeline:")
+        for name, checked, dropped in self.stats():
+            print(f"  {name}: {checked} checked, {dropped} dropped")
+
+
+def load_blocklist(path):
+    """Reads one username per line; blank lines and lines starting with '#' are ignored."""
+    return set(load_usernames(path))
+
+
+def load_usernames(path):
+    """Reads a username list such as a blocklist or watchlist, in file order and without duplicates."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        usernames = [line.strip().lstrip('@').lower() for line in f if line.strip() and not line.startswith('#')]
+    return list(dict.fromkeys(usernames))
+
+
+def seen_before(seen):
+    """Drops usernames already recorded in the seen index.
+
+    Only checks: a username is recorded once it is stored or skipped, so one dropped at
+    stop or given up after retries is looked at again by a later run.
+    """
+    return Stage('seen-before', lambda candidate, state: candidate['username'] not in seen)
+
+
+def new_in_run(journal):
+    """Drops usernames the run journal already knows, recording new ones as discovered."""
+    return Stage('run-journal', lambda candidate, state: journal.mark_discovered(candidate['username']))
+
+
+def not_blocked(blocklist):
+    return Stage('blocklist', lambda candidate, state: candidate['username'].lower() not in blocklist)
+
+
+def followers_in_range(min_followers=0, max_followers=None, cache=None):
+    """Keeps candidates with min_followers <= followers < max_followers.
+
+    The loaded profile is kept on the candidate so the reel walk does not fetch it again.
+    """
+    def check(candidate, L):
+        username = candidate['username']
+        followers_count = cache.get_followers_count(username) if cache is not None else None
+        if followers_count is None:
+            profile = load_profile(L, username)
+            if profile is None:
+                return False
+            candidate['profile'] = profile
+            followers_count = profile.followers
+            if cache is not None:
+                cache.set_followers_count(username, followers_count)
+        candidate['followers_count'] = followers_count
+        if followers_count < min_followers or (max_followers is not None and followers_count >= max_followers):
+            print(f"Skipped {username} with {followers_count} followers (outside {min_followers}-{max_followers}).")
+            return False
+        return True
+
+    return Stage('follower-range', check, cost=COST_PROFILE)
+
+
+def with_reel_stats(score, cache=None, max_reels=10):
+    """Walks the last reels and scores them with `score(likes, comments, views)`; drops the candidate on failure."""
+    def check(candidate, L):
+        reel_stats = get_reel_stats_of_last_reels(
+            L, candidate['username'], max_reels=max_reels, cache=cache, profile=candidate.get('profile')
+        )
+        if reel_stats is None:
+            return False
+        candidate['reel_stats'] = reel_stats
+        candidate['engagement'] = score(reel_stats['likes'], reel_stats['comments'], reel_stats['views'])
+        return True
+
+    return Stage('reel-stats', check, cost=COST_REELS)
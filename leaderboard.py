@@ -0,0 +1,52 @@
+import csv
+import heapq
+import itertools
+import os
+import threading
+
+
+class TopK:
+    """Keeps the `k` highest-scoring rows seen so far in a bounded min-heap.
+
+    `add(row)` costs O(log k) and memory stays O(k) however many creators are scored,
+    so the leaderboard is always current and never needs the results file read back
+    or sorted. Rows are dicts scored by their `key` field; on equal scores the row
+    added first ranks higher.
+    """
+
+    def __init__(self, k, key='engagement'):
+        self.k = k
+        self.key = key
+        self._heap = []  # (score, -arrival, row); the root is the weakest row kept
+        self._arrivals = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, row):
+        """Offers a scored row; returns True if it made the top k."""
+        entry = (row[self.key], -next(self._arrivals), row)
+        with self._lock:
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+                return True
+            if entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+                return True
+            return False
+
+    def top(self, n=None):
+        """Returns the best `n` rows (all k by default), highest score first."""
+        with self._lock:
+            entries = heapq.nlargest(n or self.k, self._heap, key=lambda entry: entry[:2])
+        return [row for _, _, row in entries]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def write_csv(self, csv_path, fieldnames, n=None):
+        """Writes the current leaderboard to `csv_path`, replacing the file atomically."""
+        tmp_path = csv_path + '.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.top(n))
+        os.replace(tmp_path, csv_path)
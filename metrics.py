@@ -0,0 +1,211 @@
+import bisect
+import collections
+import contextlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds of the latency buckets; a page interaction or a lookup lands anywhere from ms to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+OUTCOMES = ('success', 'failure', 'skipped')
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile; inf when it falls past the last bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Timing:
+    """Handed out by `Metrics.time`; set `outcome = 'skipped'` when the stage ran but dropped its input."""
+
+    def __init__(self):
+        self.outcome = 'success'
+
+
+class Metrics:
+    """Per-stage latency histograms and outcome counters, plus a throughput gauge.
+
+    Wrap a stage in `with metrics.time('navigate'):` to record how long it took; it
+    counts as a success, as a failure when it raises and as skipped when the block
+    sets `timing.outcome = 'skipped'`. Throughput is the number of successes of
+    `throughput_stage` per minute over the last `window` seconds. `render()` gives the
+    Prometheus text format and `summary()` a single log line. Thread-safe.
+    """
+
+    def __init__(self, throughput_stage='save', window=300):
+        self.throughput_stage = throughput_stage
+        self.window = window
+        self.started = time.monotonic()
+        self._histograms = {}
+        self._outcomes = collections.defaultdict(collections.Counter)
+        self._completions = collections.deque()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        timing = Timing()
+        started = time.monotonic()
+        try:
+            yield timing
+        except Exception:
+            timing.outcome = 'failure'
+            raise
+        except BaseException:
+            timing.outcome = None  # Cancelled or interrupted, which says nothing about the stage
+            raise
+        finally:
+            if timing.outcome is not None:
+                self.observe(stage, time.monotonic() - started, timing.outcome)
+
+    def observe(self, stage, seconds, outcome='success'):
+        """Records one run of a stage that was timed elsewhere."""
+        now = time.monotonic()
+        with self._lock:
+            if stage not in self._histograms:
+                self._histograms[stage] = Histogram()
+            self._histograms[stage].observe(seconds)
+            self._outcomes[stage][outcome] += 1
+            if stage == self.throughput_stage and outcome == 'success':
+                self._completions.append(now)
+
+    def throughput(self):
+        """Successes of the throughput stage per minute over the window (or since the start, if that is shorter)."""
+        now = time.monotonic()
+        with self._lock:
+            while self._completions and self._completions[0] < now - self.window:
+                self._completions.popleft()
+            completed = len(self._completions)
+        span = min(self.window, now - self.started)
+        return completed / span * 60 if span > 0 else 0.0
+
+    def render(self):
+        """The metrics in Prometheus' text exposition format."""
+        lines = [
+            '# HELP scout_stage_seconds Time spent in each scouting stage.',
+            '# TYPE scout_stage_seconds histogram',
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'scout_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'scout_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'scout_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines += [
+                '# HELP scout_stage_total Stage runs by outcome.',
+                '# TYPE scout_stage_total counter',
+            ]
+            for stage, outcomes in sorted(self._outcomes.items()):
+                for outcome in OUTCOMES:
+                    lines.append(f'scout_stage_total{{stage="{stage}",outcome="{outcome}"}} {outcomes[outcome]}')
+        lines += [
+            f'# HELP scout_throughput_per_minute Successful {self.throughput_stage} runs per minute over the last {self.window} seconds.',
+            '# TYPE scout_throughput_per_minute gauge',
+            f'scout_throughput_per_minute {self.throughput():.3f}',
+            '# HELP scout_uptime_seconds Seconds since the metrics started.',
+            '# TYPE scout_uptime_seconds gauge',
+            f'scout_uptime_seconds {time.monotonic() - self.started:.1f}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """One line with the throughput and, per stage, its outcomes, mean latency and p95 bucket; slowest stage first."""
+        with self._lock:
+            stages = sorted(self._histograms.items(), key=lambda item: item[1].sum, reverse=True)
+            parts = []
+            for stage, histogram in stages:
+                outcomes = self._outcomes[stage]
+                counts = '/'.join(str(outcomes[outcome]) for outcome in OUTCOMES)
+                parts.append(f"{stage} {counts} avg {histogram.sum / histogram.count:.2f}s p95<={histogram.quantile(0.95):g}s")
+        return "[metrics] " + ' | '.join([f"{self.throughput():.1f} {self.throughput_stage}/min"] + parts) + " (ok/failed/skipped)"
+
+
+# Shared by every module of a run, like the single rate limiter is
+METRICS = Metrics()
+
+
+class MetricsServer:
+    """Serves `metrics.render()` at http://<host>:<port>/metrics from a daemon thread."""
+
+    def __init__(self, metrics=METRICS, port=9108, host='127.0.0.1'):
+        metrics_to_serve = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics_to_serve.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.url = f'http://{host}:{self._httpd.server_address[1]}/metrics'
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def start_metrics_server(metrics=METRICS, port=9108, host='127.0.0.1'):
+    """Starts a MetricsServer, or returns None when the port cannot be bound (e.g. another run holds it)."""
+    try:
+        server = MetricsServer(metrics, port, host)
+    except OSError as e:
+        print(f"Running without the metrics endpoint, port {port} is not available: {e}")
+        return None
+    print(f"Metrics served at {server.url}")
+    return server
+
+
+class SummaryReporter:
+    """Prints `metrics.summary()` every `interval` seconds from a daemon thread until stopped."""
+
+    def __init__(self, metrics=METRICS, interval=60):
+        self.metrics = metrics
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._report, name='metrics-summary', daemon=True)
+        self._thread.start()
+
+    def _report(self):
+        while not self._stopped.wait(self.interval):
+            print(self.metrics.summary())
+
+    def stop(self):
+        """Stops reporting and prints a last summary."""
+        if not self._stopped.is_set():
+            self._stopped.set()
+            print(self.metrics.summary())
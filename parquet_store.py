@@ -0,0 +1,160 @@
+import argparse
+import csv
+import datetime
+import itertools
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional; the CSV sink works without pyarrow
+    pa = None
+
+if pa is not None:
+    # Typed columns of a stored result; fields a script does not collect stay null
+    RESULT_SCHEMA = pa.schema([
+        ('username', pa.string()),
+        ('followers_count', pa.int64()),
+        ('likes', pa.int64()),
+        ('comments', pa.int64()),
+        ('views', pa.int64()),
+        ('reel_count', pa.int32()),
+        ('engagement', pa.float64()),
+        ('scored_at', pa.timestamp('ms', tz='UTC')),
+    ])
+    # Directory levels, hive style: <root>/day=2024-05-01/run_id=<run>/part-....parquet
+    PARTITION_SCHEMA = pa.schema([('day', pa.string()), ('run_id', pa.string())])
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet results need pyarrow: pip install pyarrow")
+
+
+class ParquetResultSink:
+    """Writes results as typed Parquet files partitioned by day and run.
+
+    Same interface as CsvResultSink: rows are buffered and every batch of `batch_size`
+    rows becomes one Parquet file, written to a temporary name and renamed so readers
+    never see a partial file. `scored_at` defaults to the time the row was written.
+    `on_flush(rows)` is called with every batch once it is on disk.
+    """
+
+    def __init__(self, root, run_id='default', batch_size=500, on_flush=None):
+        _require_pyarrow()
+        self.path = root
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self._rows = []
+        self._parts = itertools.count()
+        self._closed = False
+
+    def write(self, row):
+        """Buffers one row, writing the batch out once it is full."""
+        row = dict(row)
+        row.setdefault('scored_at', datetime.datetime.now(datetime.timezone.utc))
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows, one file per day they were scored on."""
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row['scored_at'].strftime('%Y-%m-%d'), []).append(row)
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S')
+        for day, day_rows in by_day.items():
+            directory = os.path.join(self.path, f'day={day}', f'run_id={self.run_id}')
+            os.makedirs(directory, exist_ok=True)
+            file_path = os.path.join(directory, f'part-{stamp}-{next(self._parts):05d}.parquet')
+            table = pa.Table.from_pylist(
+                [{name: row.get(name) for name in RESULT_SCHEMA.names} for row in day_rows], schema=RESULT_SCHEMA
+            )
+            pq.write_table(table, file_path + '.tmp')
+            os.replace(file_path + '.tmp', file_path)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+
+    def close(self):
+        if not self._closed:
+            self.flush()
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_results(root, columns=None, filters=None):
+    """Loads stored results into a DataFrame, reading only the requested columns and matching rows.
+
+    `filters` are pyarrow's DNF tuples, e.g. [('day', '>=', '2024-05-01'), ('engagement', '>', 0.05)];
+    conditions on day or run_id skip whole directories and the others skip row groups by
+    their statistics. `day` and `run_id` can be selected like any stored column.
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(root, format='parquet', partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'))
+    table = dataset.to_table(columns=columns, filter=pq.filters_to_expression(filters) if filters else None)
+    return table.to_pandas()
+
+
+def export_csv(root, csv_path, columns=None, filters=None):
+    """Writes the selected results to a flat CSV file, for tools that expect the old output."""
+    frame = read_results(root, columns, filters)
+    frame.to_csv(csv_path, index=False)
+    return len(frame)
+
+
+def import_csv(csv_path, root, run_id='imported'):
+    """Loads one of the scripts' CSV outputs into the store; columns a file lacks stay null."""
+    _require_pyarrow()
+    scored_at = datetime.datetime.fromtimestamp(os.path.getmtime(csv_path), datetime.timezone.utc)
+    imported = 0
+    with open(csv_path, newline='', encoding='utf-8') as f, ParquetResultSink(root, run_id) as sink:
+        for row in csv.DictReader(f):
+            typed = {'username': row.get('username'), 'scored_at': scored_at}
+            for name in ('followers_count', 'likes', 'comments', 'views', 'reel_count'):
+                if row.get(name) not in (None, ''):
+                    typed[name] = int(float(row[name]))
+            if row.get('engagement') not in (None, ''):
+                typed['engagement'] = float(row['engagement'])
+            sink.write(typed)
+            imported += 1
+    return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import CSV results into the Parquet store or export them back to CSV.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help="load CSV outputs into the store")
+    import_parser.add_argument('root', help="store directory")
+    import_parser.add_argument('csv_paths', nargs='+', help="CSV files written by the scouting scripts")
+    export_parser = commands.add_parser('export', help="write stored results to a CSV file")
+    export_parser.add_argument('root', help="store directory")
+    export_parser.add_argument('csv_path', help="CSV file to write")
+    export_parser.add_argument('--since', help="first day to export, YYYY-MM-DD")
+    export_parser.add_argument('--run-id', help="only export this run")
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        for csv_path in args.csv_paths:
+            run_id = os.path.splitext(os.path.basename(csv_path))[0]
+            print(f"Imported {import_csv(csv_path, args.root, run_id)} rows from {csv_path}")
+    else:
+        filters = []
+        if args.since:
+            filters.append(('day', '>=', args.since))
+        if args.run_id:
+            filters.append(('run_id', '==', args.run_id))
+        print(f"Exported {export_csv(args.root, args.csv_path, filters=filters or None)} rows to {args.csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import random
+import re
+import threading
+import time
+
+import instaloader
+
+# Text Instagram and instaloader use when a client is being throttled or challenged
+THROTTLE_MARKERS = (
+    'too many requests', 'please wait a few minutes',
+    'checkpoint_required', 'challenge_required', 'feedback_required',
+)
+# A 429 status inside a message, as in instaloader's "HTTP error code 429."; a bare '429' would match handles like user429
+THROTTLE_STATUS_PATTERN = re.compile(r'\b(?:http error code|status(?: code)?:?)\s*429\b')
+
+
+def is_throttled(error):
+    """Tells whether an exception (or anything it was raised from) signals throttling rather than a bad profile."""
+    while error is not None:
+        if isinstance(error, instaloader.exceptions.TooManyRequestsException):
+            return True
+        response = getattr(error, 'response', None)
+        if getattr(error, 'status', None) == 429 or getattr(response, 'status_code', None) == 429:
+            return True
+        message = str(error).lower()
+        if any(marker in message for marker in THROTTLE_MARKERS) or THROTTLE_STATUS_PATTERN.search(message):
+            return True
+        error = error.__cause__
+    return False
+
+
+def backoff_delay(attempt, base=30, cap=900):
+    """Exponential backoff with jitter: between half and all of base * 2**attempt seconds, capped at `cap`."""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class RetryQueue:
+    """Items whose lookup failed, each due again after a jittered exponential backoff.
+
+    Lets a single-threaded loop such as a browser session keep going while a failed
+    lookup waits for its retry, instead of sleeping through the backoff or aborting.
+    """
+
+    def __init__(self, max_attempts=3, base=30):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.given_up = 0
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def call(self, fn, item, attempt=0, limiter=None):
+        """Returns `fn(item)`; if it raises, the item is scheduled for a retry (or given up) and None is returned."""
+        try:
+            return fn(item)
+        except Exception as e:
+            if limiter is not None and is_throttled(e):
+                limiter.on_throttle()
+            if attempt + 1 >= self.max_attempts:
+                self.given_up += 1
+                print(f"Giving up on {item} after {self.max_attempts} attempts: {e}")
+                return None
+            delay = backoff_delay(attempt, self.base)
+            heapq.heappush(self._heap, (time.monotonic() + delay, attempt + 1, item))
+            print(f"Lookup of {item} failed ({e}), retrying in {delay:.0f} seconds (attempt {attempt + 2} of {self.max_attempts}).")
+            return None
+
+    def due(self):
+        """Removes and returns the items whose retry is due, as (item, attempt) pairs."""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, attempt, item = heapq.heappop(self._heap)
+            due.append((item, attempt))
+        return due
+
+
+class AdaptiveRateLimiter:
+    """Token bucket shared by every request the scraper sends to Instagram, browser and instaloader alike.
+
+    `acquire()` blocks until a token is available. The refill rate adapts AIMD-style:
+    every `on_success()` adds `increase` requests per second up to `max_rate`, and a
+    throttling signal passed to `on_throttle()` multiplies it by `decrease` and pauses
+    all callers for a jittered exponential backoff that grows with consecutive throttles.
+    Throttles reported while a pause is running belong to the same event, so parallel
+    workers hitting the same 429 slow the rate down only once.
+    """
+
+    def __init__(self, rate=1.0, min_rate=0.05, max_rate=3.0, burst=5, increase=0.02, decrease=0.5,
+                 base_backoff=30, max_backoff=900):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _take(self, started):
+        """Takes a token and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                self.acquired += 1
+                self.waited += now - started
+                return 0
+            return max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+    def acquire(self):
+        """Blocks until the next request may be sent."""
+        started = time.monotonic()
+        while (wait := self._take(started)) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Waits for the next request slot without blocking the event loop."""
+        started = time.monotonic()
+        while (wait := self._take(started)) > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """Additive increase after a request went through unthrottled."""
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """Multiplicative decrease plus a pause for every caller; `retry_after` overrides the backoff when the server sent one."""
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            if now < self._paused_until:
+                return
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            delay = retry_after or backoff_delay(self._consecutive_throttles, self.base_backoff, self.max_backoff)
+            self._consecutive_throttles += 1
+            self._paused_until = now + delay
+            # Nothing accrues during the pause, and the bucket restarts empty afterwards
+            self._tokens = 0.0
+            self._updated = self._paused_until
+        print(f"Throttled by Instagram, pausing {delay:.0f} seconds and slowing down to {self.rate:.2f} requests per second.")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': round(self.rate, 3),
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'waited_seconds': round(self.waited, 1),
+            }
+
+
+class LimitedRateController(instaloader.RateController):
+    """Instaloader rate controller that also takes a token from the shared limiter before every query.
+
+    Instaloader's own sliding-window guard stays in place as a ceiling. A 429 is reported to
+    the limiter instead of sleeping here, so the retry instaloader makes next waits in
+    `acquire()` together with every other client.
+    """
+
+    def __init__(self, context, limiter):
+        super().__init__(context)
+        self._limiter = limiter
+
+    def wait_before_query(self, query_type):
+        super().wait_before_query(query_type)
+        self._limiter.acquire()
+
+    def handle_429(self, query_type):
+        self._limiter.on_throttle()
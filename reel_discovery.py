@@ -0,0 +1,89 @@
+import re
+
+# Instagram handles: letters, digits, periods and underscores, at most 30 characters
+USERNAME_PATTERN = re.compile(r'^[A-Za-z0-9._]{1,30}$')
+
+# First path segments that look like handles but are Instagram pages
+RESERVED_PATHS = {
+    'accounts', 'direct', 'explore', 'reels', 'reel', 'p', 'stories', 'tv',
+    'about', 'legal', 'developer', 'web', 'emails', 'challenge', 'session',
+}
+
+# Endpoints the Reels page loads its feed items from
+FEED_RESPONSE_MARKERS = ('/graphql/query', '/api/graphql', '/api/v1/clips/')
+
+
+def is_valid_username(username):
+    return bool(username) and USERNAME_PATTERN.match(username) is not None and username.lower() not in RESERVED_PATHS
+
+
+def find_media_authors(data, authors=None):
+    """Walks a decoded JSON response and collects the author handle of every media item in it.
+
+    Media items are recognised by carrying a shortcode plus an owner/user object, which
+    skips commenters and other accounts mentioned in the payload.
+    """
+    if authors is None:
+        authors = []
+    if isinstance(data, dict):
+        if 'code' in data or 'shortcode' in data:
+            owner = data.get('owner') or data.get('user')
+            if isinstance(owner, dict) and is_valid_username(owner.get('username')):
+                authors.append(owner['username'])
+        for value in data.values():
+            find_media_authors(value, authors)
+    elif isinstance(data, list):
+        for value in data:
+            find_media_authors(value, authors)
+    return authors
+
+
+class AsyncFeedHarvester:
+    """Collects reel author handles from the Reels page without opening the Embed modal.
+
+    Feed responses are captured through Playwright's response event and only decoded
+    when `harvest()` is awaited from the browsing loop, so a whole loaded batch is
+    returned at once. Only the owner of each media item counts: profile links on the
+    page also point at mentioned and tagged accounts, so the page itself is not read.
+    With a `limiter`, throttled or challenged feed requests are reported to it and
+    successful ones let it speed up again. The page comes from playwright.async_api.
+    """
+
+    def __init__(self, page, limiter=None):
+        self.page = page
+        self.limiter = limiter
+        self.seen = set()
+        self._responses = []
+        page.on('response', self._on_response)
+
+    def _on_response(self, response):
+        if self.limiter is not None and (response.status == 429 or '/challenge/' in response.url):
+            self.limiter.on_throttle()
+            return
+        if any(marker in response.url for marker in FEED_RESPONSE_MARKERS):
+            self._responses.append(response)
+            if self.limiter is not None and response.ok:
+                self.limiter.on_success()
+
+    async def _harvest_responses(self):
+        authors = []
+        responses, self._responses = self._responses, []
+        for response in responses:
+            try:
+                if 'json' not in (response.headers.get('content-type') or ''):
+                    continue
+                find_media_authors(await response.json(), authors)
+            except Exception as e:
+                print(f"Could not read feed response {response.url}: {e}")
+        return authors
+
+    def add(self, username):
+        """Records an author found some other way; returns False if it was already seen."""
+        if username in self.seen:
+            return False
+        self.seen.add(username)
+        return True
+
+    async def harvest(self):
+        """Returns the authors from feed responses that were not seen before in this session."""
+        return [username for username in await self._harvest_responses() if self.add(username)]
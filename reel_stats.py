@@ -0,0 +1,172 @@
+import datetime
+
+import instaloader
+
+from rate_limiter import is_throttled
+
+
+def is_transient(error):
+    """Throttling, connection failures and a lost login are worth retrying later; anything else is a property of the profile.
+
+    A logged-out session raises LoginRequiredException or AbortDownloadException for
+    every profile alike, so treating those as a bad profile would skip every creator
+    looked up after the session expired.
+    """
+    if isinstance(error, (instaloader.exceptions.LoginRequiredException, instaloader.exceptions.AbortDownloadException)):
+        return True
+    if isinstance(error, instaloader.exceptions.QueryReturnedNotFoundException):
+        return False
+    return is_throttled(error) or isinstance(error, instaloader.exceptions.ConnectionException)
+
+
+def load_profile(L, username):
+    """Fetches the instaloader profile metadata for a username, or None if it cannot be loaded.
+
+    The returned profile carries the exact follower count and is reused for the reel walk,
+    so one metadata request serves both lookups. Transient errors (see `is_transient`) are
+    raised instead of returning None, so the caller can retry the creator later. `L` is
+    the session's Instaloader, so the lookup is logged in and paced by the shared limiter.
+    """
+    if L is None:
+        raise ValueError("load_profile needs the session's Instaloader, e.g. SessionManager.new_instaloader()")
+
+    try:
+        return instaloader.Profile.from_username(L.context, username)
+    except instaloader.exceptions.ProfileNotExistsException:
+        print(f"The profile {username} does not exist.")
+        return None
+    except Exception as e:
+        if is_transient(e):
+            raise
+        print(f"An error occurred when loading the profile of {username}: {e}")
+        return None
+
+
+def get_reel_stats_of_last_reels(L, username, max_reels=10, cache=None, profile=None):
+    """Walks the profile's posts once, collecting likes, comments and views of the last reels.
+
+    Returns a dict with the totals, the number of reels walked and the per-reel values,
+    or None if the profile could not be loaded; transient errors are raised. Pass an
+    already loaded `profile` to skip the metadata fetch. When a `cache` is given it is
+    read before going to the network and filled after a successful walk.
+    """
+    if cache is not None:
+        reel_stats = cache.get_reel_stats(username)
+        if reel_stats is not None:
+            return reel_stats
+
+    if profile is None:
+        profile = load_profile(L, username)
+        if profile is None:
+            return None
+
+    reel_stats = _walk_reels(profile, max_reels)
+    if cache is not None and reel_stats is not None:
+        cache.set_reel_stats(username, reel_stats)
+    return reel_stats
+
+
+def refresh_reel_stats(L, username, previous_reels, max_reels=10, profile=None):
+    """Re-scores a creator from the reels stored last time instead of walking the posts from scratch.
+
+    Pagination stops at the first known (unpinned) reel once the page holding it is used
+    up, so a creator with no new reels costs the profile metadata plus the first page of
+    posts; anonymous sessions get that page with the metadata, logged-in ones query it
+    separately when get_posts() is called. Reels on the pages read get fresh counts,
+    known reels further back keep their stored ones, and the aggregates are recomputed
+    over the newest `max_reels` of both. `previous_reels` is newest first, as the
+    'reels' list returned by get_reel_stats_of_last_reels. Returns the same dict, or
+    None if the profile could not be loaded; transient errors are raised.
+    """
+    if not previous_reels:
+        return get_reel_stats_of_last_reels(L, username, max_reels=max_reels, profile=profile)
+    if profile is None:
+        profile = load_profile(L, username)
+        if profile is None:
+            return None
+
+    known = {reel['shortcode'] for reel in previous_reels}
+    try:
+        fresh = []
+        reached_known = False
+        posts = profile.get_posts()
+        for post in posts:
+            if post.is_video:
+                fresh.append(_reel_from_post(post))
+                if post.shortcode in known and not post.is_pinned:
+                    reached_known = True
+                if len(fresh) == max_reels:
+                    break
+            if reached_known and not _next_post_loaded(posts):
+                break
+    except Exception as e:
+        if is_transient(e):
+            raise
+        print(f"An error occurred when refreshing reel stats of {username}: {e}")
+        return None
+
+    refreshed = {reel['shortcode'] for reel in fresh}
+    reels = fresh + [reel for reel in previous_reels if reel['shortcode'] not in refreshed]
+    return _aggregate(reels[:max_reels])
+
+
+def _next_post_loaded(posts):
+    """Tells whether the iterator can yield its next post from a page it already fetched.
+
+    This reads NodeIterator's private paging state. Should that change shape, the answer
+    is False, which only ends the walk right at the known reel instead of at its page end.
+    """
+    try:
+        return posts._page_index < len(posts._data['edges'])
+    except (AttributeError, KeyError, TypeError):
+        return False
+
+
+def _reel_from_post(post):
+    return {
+        'shortcode': post.shortcode,
+        'posted_at': post.date_utc.replace(tzinfo=datetime.timezone.utc).timestamp(),
+        'likes': post.likes,
+        'comments': _comment_count(post),
+        'views': post.video_view_count or 0,
+    }
+
+
+def _comment_count(post):
+    """Reads the comment count the post's page already carries.
+
+    Posts of a logged-in walk are built from the feed's iPhone struct, which keeps the
+    count under the node's 'comments' key; Post.comments ignores it and fetches the
+    post's full metadata, one request per reel. Only when the node lacks the count is
+    Post.comments asked.
+    """
+    node = getattr(post, '_node', None)
+    count = node.get('comments') if isinstance(node, dict) else None
+    return count if isinstance(count, int) else post.comments
+
+
+def _aggregate(reels):
+    return {
+        'likes': sum(reel['likes'] for reel in reels),
+        'comments': sum(reel['comments'] for reel in reels),
+        'views': sum(reel['views'] for reel in reels),
+        'reel_count': len(reels),
+        'reels': reels,
+    }
+
+
+def _walk_reels(profile, max_reels):
+    try:
+        reels = []
+        for post in profile.get_posts():
+            if post.is_video:
+                reels.append(_reel_from_post(post))
+            if len(reels) == max_reels:
+                break
+
+        return _aggregate(reels)
+    except Exception as e:
+        if is_transient(e):
+            raise
+        print(f"An error occurred when getting reel stats of {profile.username}: {e}")
+        return None
@@ -0,0 +1,70 @@
+import csv
+import os
+
+
+class CsvResultSink:
+    """Append-only CSV writer that stays open for the whole run.
+
+    The header is written only when the file is new, rows are buffered and appended
+    in batches of `batch_size`, and the file is fsynced after every batch so a crash
+    loses at most one batch instead of corrupting the file. `on_flush(rows)` is called
+    with every batch once it is on disk. Row fields outside `fieldnames` are not written.
+    """
+
+    def __init__(self, csv_path, fieldnames, batch_size=10, on_flush=None):
+        self.csv_path = csv_path
+        self.path = csv_path
+        self.fieldnames = list(fieldnames)
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self._rows = []
+        is_new = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+        self._file = open(csv_path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if is_new:
+            self._writer.writeheader()
+            self._sync()
+
+    def write(self, row):
+        """Buffers one row, appending the batch to disk once it is full."""
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered rows and fsyncs the file."""
+        rows, self._rows = self._rows, []
+        if rows:
+            self._writer.writerows(rows)
+        self._sync()
+        if rows and self.on_flush is not None:
+            self.on_flush(rows)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_result_sink(path, fieldnames, format='csv', **options):
+    """Opens the result sink for an output format: 'csv' appends to the file at `path`,
+    'parquet' writes typed files partitioned by day and run under the directory `path`,
+    'sqlite' upserts creators into the database at `path`.
+    """
+    if format == 'sqlite':
+        from results_db import ResultsDB
+        return ResultsDB(path, **options)
+    if format == 'parquet':
+        from parquet_store import ParquetResultSink  # pyarrow is only needed for Parquet output
+        return ParquetResultSink(path, **options)
+    return CsvResultSink(path, fieldnames, **options)
@@ -0,0 +1,177 @@
+import csv
+import sqlite3
+import threading
+import time
+
+# Creator columns a result row may carry; a missing value never overwrites a stored one
+CREATOR_FIELDS = ['followers_count', 'likes', 'comments', 'views', 'reel_count', 'engagement']
+
+
+class ResultsDB:
+    """SQLite store of scouted creators and the reel snapshots they were scored on.
+
+    The database runs in WAL mode so queries never block the writer. Rows are upserted
+    by username, so a creator scouted again is updated instead of duplicated, and the
+    follower count and engagement columns are indexed for band and top-N queries. It is
+    also a result sink like CsvResultSink: `write(row)` buffers, and every `batch_size`
+    rows are upserted in one transaction before `on_flush(rows)` is called. A row's
+    optional 'reels' list (as get_reel_stats_of_last_reels returns it) is kept as
+    snapshots of those reels, which `latest_reels` hands back for an incremental refresh.
+    """
+
+    def __init__(self, db_path='scout_results.db', batch_size=10, on_flush=None, run_id=None):
+        self.path = db_path
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.run_id = run_id
+        self._rows = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # Durable at every checkpoint, safe against corruption in WAL mode
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS creators (
+                username TEXT PRIMARY KEY,
+                followers_count INTEGER,
+                likes INTEGER,
+                comments INTEGER,
+                views INTEGER,
+                reel_count INTEGER,
+                engagement REAL,
+                run_id TEXT,
+                first_seen_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_creators_followers ON creators (followers_count);
+            CREATE INDEX IF NOT EXISTS idx_creators_engagement ON creators (engagement);
+            CREATE TABLE IF NOT EXISTS reel_snapshots (
+                username TEXT NOT NULL,
+                shortcode TEXT NOT NULL,
+                posted_at REAL,
+                likes INTEGER,
+                comments INTEGER,
+                views INTEGER,
+                captured_at REAL NOT NULL,
+                PRIMARY KEY (username, shortcode, captured_at)
+            );
+            CREATE INDEX IF NOT EXISTS idx_reel_snapshots_username ON reel_snapshots (username, captured_at);
+        """)
+        # Databases created before reels carried their posting time
+        snapshot_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reel_snapshots)")}
+        if 'posted_at' not in snapshot_columns:
+            self._conn.execute("ALTER TABLE reel_snapshots ADD COLUMN posted_at REAL")
+        self._conn.commit()
+
+    def write(self, row):
+        """Buffers one result row, upserting the batch once it is full."""
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Upserts the buffered rows and their reel snapshots in one transaction."""
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        self.upsert(rows)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+
+    def upsert(self, rows):
+        """Inserts or updates creators by username, all in one transaction."""
+        now = time.time()
+        creators = [
+            (row['username'], *(row.get(field) for field in CREATOR_FIELDS), row.get('run_id', self.run_id), now, now)
+            for row in rows
+        ]
+        snapshots = [
+            (row['username'], reel['shortcode'], reel.get('posted_at'), reel['likes'], reel['comments'], reel['views'], now)
+            for row in rows for reel in row.get('reels') or []
+        ]
+        columns = ', '.join(CREATOR_FIELDS)
+        updates = ', '.join(f"{field} = COALESCE(excluded.{field}, creators.{field})" for field in CREATOR_FIELDS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"""
+                INSERT INTO creators (username, {columns}, run_id, first_seen_at, updated_at)
+                VALUES (?, {', '.join('?' for _ in CREATOR_FIELDS)}, ?, ?, ?)
+                ON CONFLICT(username) DO UPDATE SET
+                    {updates},
+                    run_id = COALESCE(excluded.run_id, creators.run_id),
+                    updated_at = excluded.updated_at
+                """,
+                creators,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reel_snapshots (username, shortcode, posted_at, likes, comments, views, captured_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                snapshots,
+            )
+
+    def _select(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def top_by_engagement(self, n, min_followers=0, max_followers=None):
+        """Returns the `n` creators with the highest engagement and min_followers <= followers < max_followers."""
+        sql = "SELECT * FROM creators WHERE followers_count >= ?"
+        params = [min_followers]
+        if max_followers is not None:
+            sql += " AND followers_count < ?"
+            params.append(max_followers)
+        sql += " ORDER BY engagement DESC LIMIT ?"
+        params.append(n)
+        return self._select(sql, params)
+
+    def get_creator(self, username):
+        rows = self._select("SELECT * FROM creators WHERE username = ?", (username,))
+        return rows[0] if rows else None
+
+    def reel_history(self, username):
+        """Returns every stored snapshot of the creator's reels, oldest first."""
+        return self._select(
+            "SELECT shortcode, posted_at, likes, comments, views, captured_at FROM reel_snapshots "
+            "WHERE username = ? ORDER BY captured_at, shortcode",
+            (username,),
+        )
+
+    def latest_reels(self, username):
+        """Returns the reels of the creator's most recent snapshot, newest first, in the shape the reel walk returns."""
+        return self._select(
+            "SELECT shortcode, posted_at, likes, comments, views FROM reel_snapshots "
+            "WHERE username = ? AND captured_at = (SELECT MAX(captured_at) FROM reel_snapshots WHERE username = ?) "
+            "ORDER BY posted_at DESC",
+            (username, username),
+        )
+
+    def usernames(self):
+        """Returns every stored creator, most recently updated first."""
+        return [row['username'] for row in self._select("SELECT username FROM creators ORDER BY updated_at DESC")]
+
+    def count(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM creators").fetchone()
+        return count
+
+    def export_top_csv(self, csv_path, n, min_followers=0, max_followers=None,
+                       fieldnames=('username', 'followers_count', 'engagement')):
+        """Writes the top `n` creators of a follower band to a CSV file."""
+        rows = self.top_by_engagement(n, min_followers, max_followers)
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(fieldnames), extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Lifecycle of a username within a run
+DISCOVERED = 'discovered'  # Passed the local checks and queued for enrichment
+ENRICHED = 'enriched'  # Scored; the row to store is kept in the journal
+STORED = 'stored'  # Row is on disk in the results file
+SKIPPED = 'skipped'  # Dropped by a filter stage, never to be looked up again in this run
+
+
+class RunJournal:
+    """SQLite journal of a scouting run, so an interrupted run resumes where it stopped.
+
+    Every username is recorded when it is discovered, enriched (with the row that will
+    be stored) and stored, next to the run's target. Opening the journal resumes the
+    most recent run that did not finish unless `fresh=True`: usernames still marked
+    discovered are queued again, enriched rows are stored without another lookup, and
+    stored rows count towards the target. A new run takes over the usernames earlier
+    runs left discovered (dropped at stop or given up after retries), so they are queued
+    again instead of being forgotten. Writes are committed one by one, so a crash loses
+    at most the transition in progress.
+    """
+
+    def __init__(self, db_path='run_journal.db', target=None, fresh=False):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                target INTEGER,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS candidates (
+                run_id TEXT NOT NULL,
+                username TEXT NOT NULL,
+                state TEXT NOT NULL,
+                result TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, username)
+            );
+            CREATE INDEX IF NOT EXISTS idx_candidates_state ON candidates (run_id, state);
+        """)
+        row = None
+        if not fresh:
+            row = self._conn.execute(
+                "SELECT run_id, target FROM runs WHERE status = 'running' ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+        now = time.time()
+        self.carried_over = 0
+        if row is not None:
+            self.run_id, self.target = row
+            self.resumed = True
+        else:
+            self.run_id, self.target = uuid.uuid4().hex[:12], target
+            self.resumed = False
+            self._conn.execute(
+                "INSERT INTO runs (run_id, target, status, started_at, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (self.run_id, target, now, now),
+            )
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO candidates (run_id, username, state, updated_at)
+                SELECT ?, username, ?, MIN(updated_at) FROM candidates WHERE state = ? AND run_id != ? GROUP BY username
+                """,
+                (self.run_id, DISCOVERED, DISCOVERED, self.run_id),
+            )
+            self.carried_over = cursor.rowcount
+            self._conn.execute("DELETE FROM candidates WHERE state = ? AND run_id != ?", (DISCOVERED, self.run_id))
+            self._conn.commit()
+
+    def _set_state(self, username, state, result=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO candidates (run_id, username, state, result, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(run_id, username) DO UPDATE SET
+                    state = excluded.state,
+                    result = COALESCE(excluded.result, candidates.result),
+                    updated_at = excluded.updated_at
+                """,
+                (self.run_id, username, state, json.dumps(result) if result is not None else None, now),
+            )
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, self.run_id))
+            self._conn.commit()
+
+    def mark_discovered(self, username):
+        """Records a new username; returns False if this run already knows it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO candidates (run_id, username, state, updated_at) VALUES (?, ?, ?, ?)",
+                (self.run_id, username, DISCOVERED, now),
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def mark_enriched(self, username, result):
+        self._set_state(username, ENRICHED, result)
+
+    def mark_skipped(self, username):
+        self._set_state(username, SKIPPED)
+
+    def mark_stored(self, username):
+        self._set_state(username, STORED)
+
+    def usernames(self, state):
+        """Returns the usernames of this run in the given state, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username FROM candidates WHERE run_id = ? AND state = ? ORDER BY updated_at",
+                (self.run_id, state),
+            ).fetchall()
+        return [username for (username,) in rows]
+
+    def results(self, state):
+        """Returns the rows kept for usernames in the given state, e.g. ENRICHED rows that never made it to disk."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM candidates WHERE run_id = ? AND state = ? AND result IS NOT NULL ORDER BY updated_at",
+                (self.run_id, state),
+            ).fetchall()
+        return [json.loads(result) for (result,) in rows]
+
+    def progress(self):
+        """Returns the number of usernames per state in this run."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM candidates WHERE run_id = ? GROUP BY state", (self.run_id,)
+            ).fetchall()
+        counts = {DISCOVERED: 0, ENRICHED: 0, STORED: 0, SKIPPED: 0}
+        counts.update(rows)
+        return counts
+
+    def finish(self):
+        """Marks the run as finished, so the next start begins a new run that takes over its discovered usernames."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = 'finished', updated_at = ? WHERE run_id = ?", (time.time(), self.run_id)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
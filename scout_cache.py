@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Default time-to-live per cached field, in seconds
+DEFAULT_TTLS = {
+    'followers_count': 24 * 60 * 60,
+    'reel_stats': 6 * 60 * 60,
+}
+
+
+class ScoutCache:
+    """SQLite-backed cache of follower counts and reel aggregates keyed by username.
+
+    Each field has its own TTL, the table is capped at `max_entries` rows with the
+    least recently used rows evicted first, and hits/misses are counted per field.
+    """
+
+    def __init__(self, db_path='scout_cache.db', ttls=None, max_entries=50000):
+        self.db_path = db_path
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.hits = {field: 0 for field in self.ttls}
+        self.misses = {field: 0 for field in self.ttls}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS creators (
+                username TEXT PRIMARY KEY,
+                followers_count INTEGER,
+                followers_count_fetched_at REAL,
+                reel_stats TEXT,
+                reel_stats_fetched_at REAL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_creators_last_access ON creators (last_access)")
+        self._conn.commit()
+
+    def _get(self, field, username):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {field}, {field}_fetched_at FROM creators WHERE username = ?", (username,)
+            ).fetchone()
+            if row is None or row[0] is None or now - row[1] > self.ttls[field]:
+                self.misses[field] += 1
+                return None
+            self._conn.execute("UPDATE creators SET last_access = ? WHERE username = ?", (now, username))
+            self._conn.commit()
+            self.hits[field] += 1
+            return row[0]
+
+    def _set(self, field, username, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"""
+                INSERT INTO creators (username, {field}, {field}_fetched_at, last_access)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(username) DO UPDATE SET
+                    {field} = excluded.{field},
+                    {field}_fetched_at = excluded.{field}_fetched_at,
+                    last_access = excluded.last_access
+                """,
+                (username, value, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops the least recently used rows once the table grows past `max_entries`."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM creators").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM creators WHERE username IN "
+                "(SELECT username FROM creators ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def get_followers_count(self, username):
+        """Returns the cached followers count, or None if missing or expired."""
+        return self._get('followers_count', username)
+
+    def set_followers_count(self, username, followers_count):
+        self._set('followers_count', username, followers_count)
+
+    def get_reel_stats(self, username):
+        """Returns the cached reel aggregates, or None if missing or expired."""
+        reel_stats = self._get('reel_stats', username)
+        return json.loads(reel_stats) if reel_stats is not None else None
+
+    def set_reel_stats(self, username, reel_stats):
+        self._set('reel_stats', username, json.dumps(reel_stats))
+
+    def stats(self):
+        """Returns the hit/miss counters per field."""
+        return {field: {'hits': self.hits[field], 'misses': self.misses[field]} for field in self.ttls}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
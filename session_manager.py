@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import instaloader
+
+from browser_session import load_storage_state, save_storage_state, write_storage_state
+from rate_limiter import AdaptiveRateLimiter, LimitedRateController
+
+
+def _browser_cookie(name, value):
+    return {
+        'name': name,
+        'value': value,
+        'domain': '.instagram.com',
+        'path': '/',
+        'expires': -1,
+        'httpOnly': name == 'sessionid',
+        'secure': True,
+        'sameSite': 'Lax',
+    }
+
+
+class SessionManager:
+    """One authenticated Instagram session shared by Playwright and instaloader.
+
+    The cookies come from the saved Playwright storage state when it is still valid,
+    otherwise from instaloader's session file, and only as a last resort from a fresh
+    instaloader login. Browser contexts and Instaloader instances are then built from
+    those cookies without logging in again, and `renew_from_browser_async` copies a renewed
+    browser login back to both stores. Instaloaders kept for a whole run pick the
+    renewed cookies up through `refresh(L)`, which reloads them once per renewal. Every
+    Instaloader built here takes its queries from the session's `limiter`, which the
+    browser code shares as well.
+    """
+
+    def __init__(self, username, password, state_path=None, limiter=None):
+        self.username = username
+        self.password = password
+        self.state_path = state_path or f'{username}_playwright_state.json'
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self._lock = threading.Lock()
+        self._state = None
+        self._shared_loader = None
+        self.generation = 0  # Bumped whenever the cookies are renewed
+        self._loaded = weakref.WeakKeyDictionary()  # Instaloader -> generation of the cookies it holds
+
+    def _ensure_session(self):
+        if self._state is not None:
+            return
+        state = load_storage_state(self.state_path)
+        if state is None:
+            # Bootstrap the browser state from instaloader's session, logging in only if there is none
+            L = self._build_instaloader()
+            try:
+                L.load_session_from_file(self.username)
+            except FileNotFoundError:
+                self._login(L)
+            state = {
+                'cookies': [_browser_cookie(name, value) for name, value in L.save_session().items()],
+                'origins': [],
+            }
+        self._state = state
+
+    def _build_instaloader(self):
+        return instaloader.Instaloader(rate_controller=lambda context: LimitedRateController(context, self.limiter))
+
+    def _login(self, L):
+        print("No saved Instagram session, logging in once for this run...")
+        try:
+            L.login(self.username, self.password)
+        except instaloader.exceptions.TwoFactorAuthRequiredException:
+            L.two_factor_login(input("Enter the two-factor authentication code: "))
+        L.save_session_to_file(self.username)
+
+    def cookies(self):
+        """Returns the session's Instagram cookies as a name -> value dict."""
+        with self._lock:
+            self._ensure_session()
+            return {
+                cookie['name']: cookie['value']
+                for cookie in self._state['cookies']
+                if 'instagram.com' in cookie.get('domain', '')
+            }
+
+    def new_instaloader(self):
+        """Builds an Instaloader on the shared session; give each thread its own, instaloader is not thread-safe."""
+        L = self._build_instaloader()
+        self._load_cookies(L)
+        return L
+
+    def _load_cookies(self, L):
+        generation = self.generation
+        L.load_session(self.username, self.cookies())
+        self._loaded[L] = generation
+
+    def refresh(self, L):
+        """Reloads the session's cookies into an Instaloader built here if they were renewed since; returns `L`.
+
+        Call it from the thread that owns `L`, e.g. before each lookup of an enrichment worker.
+        """
+        if self._loaded.get(L) != self.generation:
+            self._load_cookies(L)
+        return L
+
+    def instaloader(self):
+        """Returns the Instaloader reused for the whole run on the calling thread."""
+        if self._shared_loader is None:
+            self._shared_loader = self.new_instaloader()
+        return self._shared_loader
+
+    def storage_state(self):
+        """Returns the session as a Playwright storage state dict, e.g. to open contexts in another process."""
+        with self._lock:
+            self._ensure_session()
+            return self._state
+
+    def new_browser_context(self, browser, **context_options):
+        """Opens a browser context that is already logged in with the shared session."""
+        context = browser.new_context(storage_state=self.storage_state(), **context_options)
+        if not os.path.exists(self.state_path):
+            save_storage_state(context, self.state_path)
+        return context
+
+    async def new_browser_context_async(self, browser, **context_options):
+        """new_browser_context for a browser from playwright.async_api."""
+        state = await asyncio.to_thread(self.storage_state)  # May have to log in through instaloader
+        context = await browser.new_context(storage_state=state, **context_options)
+        if not os.path.exists(self.state_path):
+            write_storage_state(await context.storage_state(), self.state_path)
+        return context
+
+    async def renew_from_browser_async(self, context):
+        """Adopts the cookies of a context that just logged in again and saves them for both clients.
+
+        The context comes from playwright.async_api.
+        """
+        state = await context.storage_state()
+        await asyncio.to_thread(self._adopt_state, state)
+
+    def _adopt_state(self, state):
+        write_storage_state(state, self.state_path)
+        with self._lock:
+            self._state = state
+            self.generation += 1
+        L = self._build_instaloader()
+        L.load_session(self.username, self.cookies())
+        L.save_session_to_file(self.username)
+        if self._shared_loader is not None:
+            self._load_cookies(self._shared_loader)
@@ -0,0 +1,98 @@
+import multiprocessing
+import queue
+import time
+
+
+class ShardSupervisor:
+    """Runs N independent discovery shards in separate processes feeding one username queue.
+
+    `target(shard_id, usernames, stop_event, stats)` is started once per shard; it must put
+    discovered usernames on `usernames`, update `stats[shard_id]` (a dict with at least
+    'discovered' and 'heartbeat') and return once `stop_event` is set. Shards use the
+    spawn start method so they never inherit the parent's threads or browser handles.
+    Shards that crash are restarted up to `max_restarts` times each.
+    """
+
+    def __init__(self, target, num_shards, queue_size=1000, max_restarts=3, stall_after=120):
+        self.target = target
+        self.num_shards = num_shards
+        self.max_restarts = max_restarts
+        self.stall_after = stall_after
+        self._ctx = multiprocessing.get_context('spawn')
+        self._manager = self._ctx.Manager()
+        self.usernames_queue = self._ctx.Queue(maxsize=queue_size)
+        self.stop_event = self._ctx.Event()
+        self.stats = self._manager.dict()
+        self.restarts = [0] * num_shards
+        self.seen = set()
+        self.duplicates = 0
+        self.started_at = time.time()
+        self._processes = [None] * num_shards
+        for shard_id in range(num_shards):
+            self._start(shard_id)
+
+    def _start(self, shard_id):
+        self.stats[shard_id] = {'discovered': 0, 'heartbeat': time.time(), 'status': 'starting'}
+        process = self._ctx.Process(
+            target=self.target,
+            args=(shard_id, self.usernames_queue, self.stop_event, self.stats),
+            name=f"discovery-shard-{shard_id}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[shard_id] = process
+
+    def check_health(self):
+        """Restarts shards whose process crashed and returns a status line per shard."""
+        now = time.time()
+        report = []
+        for shard_id, process in enumerate(self._processes):
+            if not process.is_alive() and not self.stop_event.is_set() and process.exitcode != 0:
+                if self.restarts[shard_id] < self.max_restarts:
+                    self.restarts[shard_id] += 1
+                    print(f"Shard {shard_id} exited with code {process.exitcode}, restarting it.")
+                    self._start(shard_id)
+                else:
+                    self.stats[shard_id] = dict(self.stats[shard_id], status='dead')
+            shard_stats = self.stats[shard_id]
+            status = shard_stats['status']
+            if status == 'running' and now - shard_stats['heartbeat'] > self.stall_after:
+                status = 'stalled'
+            per_hour = shard_stats['discovered'] / max(now - self.started_at, 1) * 3600
+            report.append(f"shard {shard_id}: {status}, {shard_stats['discovered']} discovered ({per_hour:.0f}/h), {self.restarts[shard_id]} restarts")
+        return report
+
+    def alive(self):
+        return any(process.is_alive() for process in self._processes)
+
+    def next_username(self, timeout=1.0):
+        """Returns the next username not handed out before, or None if none arrived within `timeout`."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                username = self.usernames_queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if username in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(username)
+            return username
+
+    def stop(self, timeout=30):
+        """Asks every shard to stop, waits for them and terminates any that do not exit in time."""
+        self.stop_event.set()
+        # Drain the queue so shards blocked on a full queue can see the stop event
+        try:
+            while True:
+                self.usernames_queue.get_nowait()
+        except queue.Empty:
+            pass
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._manager.shutdown()
@@ -0,0 +1,56 @@
+import instaloader
+import pytest
+
+import AI_scouter
+from filters import FilterPipeline, followers_in_range, with_reel_stats
+from offline import RecordedBackend, load_fixtures, recorded_instaloader
+from run_journal import RunJournal, DISCOVERED, ENRICHED, SKIPPED
+from seen_index import SeenIndex
+
+LOGGED_OUT_ERRORS = [
+    instaloader.exceptions.LoginRequiredException("Redirected to login page. Use --login or --load-cookies."),
+    instaloader.exceptions.AbortDownloadException("Redirected to login page. You've been logged out, please wait "
+                                                  "some time, recreate the session and try again"),
+]
+
+
+@pytest.fixture
+def backend():
+    creators, missing = load_fixtures()
+    return RecordedBackend(creators, missing)
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    journal = RunJournal(str(tmp_path / 'journal.db'), target=5)
+    seen = SeenIndex(str(tmp_path / 'seen.bloom'), capacity=1000)
+    pipeline = FilterPipeline([followers_in_range(0, 100000), with_reel_stats(AI_scouter.calculate_engagement)])
+    yield pipeline, journal, seen
+    journal.close()
+
+
+def test_scored_and_skipped_creators_are_recorded(backend, recorder):
+    pipeline, journal, seen = recorder
+    for username in ('noor.sings', 'gone.creator'):
+        journal.mark_discovered(username)
+    with recorded_instaloader(backend) as L:
+        assert AI_scouter.enrich_and_record(L, 'noor.sings', pipeline, journal, seen)['username'] == 'noor.sings'
+        assert AI_scouter.enrich_and_record(L, 'gone.creator', pipeline, journal, seen) is None
+    assert journal.usernames(ENRICHED) == ['noor.sings']
+    assert journal.usernames(SKIPPED) == ['gone.creator']
+    assert 'gone.creator' in seen
+
+
+@pytest.mark.parametrize('error', LOGGED_OUT_ERRORS, ids=lambda error: type(error).__name__)
+def test_a_logged_out_session_neither_skips_nor_records_the_creator(backend, recorder, error):
+    pipeline, journal, seen = recorder
+    journal.mark_discovered('noor.sings')
+
+    def logged_out(username):
+        raise error
+
+    backend.profile = logged_out
+    with recorded_instaloader(backend) as L, pytest.raises(type(error)):
+        AI_scouter.enrich_and_record(L, 'noor.sings', pipeline, journal, seen)
+    assert journal.usernames(DISCOVERED) == ['noor.sings']
+    assert 'noor.sings' not in seen
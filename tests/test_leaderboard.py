@@ -0,0 +1,35 @@
+import csv
+
+from leaderboard import TopK
+
+
+def test_keeps_the_k_best_rows_highest_first():
+    leaderboard = TopK(3)
+    for username, engagement in [('a', 0.1), ('b', 0.5), ('c', 0.3), ('d', 0.05), ('e', 0.4)]:
+        leaderboard.add({'username': username, 'engagement': engagement})
+    assert [row['username'] for row in leaderboard.top()] == ['b', 'e', 'c']
+    assert len(leaderboard) == 3
+
+
+def test_reports_whether_a_row_made_the_top():
+    leaderboard = TopK(1)
+    assert leaderboard.add({'username': 'a', 'engagement': 0.2})
+    assert not leaderboard.add({'username': 'b', 'engagement': 0.1})
+    assert leaderboard.add({'username': 'c', 'engagement': 0.3})
+
+
+def test_equal_scores_rank_the_earlier_row_first():
+    leaderboard = TopK(2)
+    for username in ('first', 'second', 'third'):
+        leaderboard.add({'username': username, 'engagement': 0.2})
+    assert [row['username'] for row in leaderboard.top()] == ['first', 'second']
+
+
+def test_write_csv(tmp_path):
+    leaderboard = TopK(5)
+    leaderboard.add({'username': 'a', 'followers_count': 10, 'engagement': 0.1, 'reels': []})
+    leaderboard.add({'username': 'b', 'followers_count': 20, 'engagement': 0.2, 'reels': []})
+    path = str(tmp_path / 'top.csv')
+    leaderboard.write_csv(path, ['username', 'followers_count', 'engagement'], n=1)
+    with open(path, newline='', encoding='utf-8') as f:
+        assert list(csv.DictReader(f)) == [{'username': 'b', 'followers_count': '20', 'engagement': '0.2'}]
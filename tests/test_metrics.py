@@ -0,0 +1,24 @@
+import socket
+import urllib.request
+
+from metrics import Metrics, start_metrics_server
+
+
+def test_serves_the_metrics():
+    metrics = Metrics()
+    with metrics.time('save'):
+        pass
+    server = start_metrics_server(metrics, port=0)
+    try:
+        with urllib.request.urlopen(server.url) as response:
+            body = response.read().decode('utf-8')
+    finally:
+        server.stop()
+    assert 'scout_stage_total{stage="save",outcome="success"} 1' in body
+
+
+def test_runs_without_the_endpoint_when_the_port_is_taken():
+    with socket.socket() as busy:
+        busy.bind(('127.0.0.1', 0))
+        busy.listen()
+        assert start_metrics_server(Metrics(), port=busy.getsockname()[1]) is None
@@ -0,0 +1,112 @@
+import datetime
+
+import pytest
+
+from offline import RecordedBackend, RecordedProfile, load_fixtures, recorded_instaloader
+from reel_stats import _reel_from_post, get_reel_stats_of_last_reels, load_profile, refresh_reel_stats
+
+
+@pytest.fixture
+def backend():
+    creators, missing = load_fixtures()
+    return RecordedBackend(creators, missing)
+
+
+@pytest.fixture
+def L(backend):
+    with recorded_instaloader(backend) as L:
+        yield L
+
+
+def test_load_profile_returns_none_for_a_missing_profile(L, backend):
+    assert load_profile(L, 'gone.creator') is None
+    assert load_profile(L, 'noor.sings').followers == backend.creators['noor.sings']['followers']
+
+
+def test_walk_collects_the_last_reels(L, backend):
+    reel_stats = get_reel_stats_of_last_reels(L, 'noor.sings', max_reels=10)
+    expected = [post for post in backend.creators['noor.sings']['posts'] if post['is_video']][:10]
+    assert reel_stats['reel_count'] == 10
+    assert [reel['shortcode'] for reel in reel_stats['reels']] == [post['shortcode'] for post in expected]
+    assert reel_stats['likes'] == sum(post['likes'] for post in expected)
+    assert reel_stats['views'] == sum(post['views'] for post in expected)
+    assert reel_stats['comments'] == sum(post['comments'] for post in expected)
+    assert 'post' not in backend.requests
+
+
+def test_refresh_without_new_reels_costs_the_profile_and_first_page(L, backend):
+    previous = get_reel_stats_of_last_reels(L, 'noor.sings', max_reels=10)['reels']
+    backend.requests.clear()
+    reel_stats = refresh_reel_stats(L, 'noor.sings', previous, max_reels=10)
+    assert backend.requests == {'profile': 1, 'posts': 1}
+    assert [reel['shortcode'] for reel in reel_stats['reels']] == [reel['shortcode'] for reel in previous]
+
+
+def test_refresh_picks_up_new_reels_and_fresh_counts(L, backend):
+    previous = get_reel_stats_of_last_reels(L, 'noor.sings', max_reels=10)['reels']
+    # The newest stored reel since gained likes, and the one before it is now outside the window
+    stale = [dict(reel, likes=0) for reel in previous[1:]]
+    reel_stats = refresh_reel_stats(L, 'noor.sings', stale, max_reels=10)
+    assert [reel['shortcode'] for reel in reel_stats['reels']] == [reel['shortcode'] for reel in previous]
+    assert reel_stats['reels'][0]['likes'] == previous[0]['likes']
+    assert reel_stats['reels'][1]['likes'] == previous[1]['likes']
+
+
+def test_refresh_of_a_missing_profile(L):
+    assert refresh_reel_stats(L, 'gone.creator', [{'shortcode': 'x', 'likes': 1, 'comments': 0, 'views': 1}]) is None
+
+
+
+class OpaqueIterator:
+    """Yields the posts of another iterator without exposing its paging state."""
+
+    def __init__(self, posts):
+        self._posts = posts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._posts)
+
+
+def test_refresh_without_paging_state_stops_at_the_known_reel(L, backend, monkeypatch):
+    previous = get_reel_stats_of_last_reels(L, 'noor.sings', max_reels=10)['reels']
+    get_posts = RecordedProfile.get_posts
+    monkeypatch.setattr(RecordedProfile, 'get_posts', lambda profile: OpaqueIterator(get_posts(profile)))
+    backend.requests.clear()
+    reel_stats = refresh_reel_stats(L, 'noor.sings', previous, max_reels=10)
+    assert backend.requests == {'profile': 1, 'posts': 1}
+    assert [reel['shortcode'] for reel in reel_stats['reels']] == [reel['shortcode'] for reel in previous]
+
+
+def test_load_profile_requires_an_instaloader():
+    with pytest.raises(ValueError):
+        load_profile(None, 'noor.sings')
+
+
+class FeedPost:
+    """A post built from a logged-in feed page: the comment count sits in its node."""
+
+    shortcode = 'feed1'
+    date_utc = datetime.datetime(2026, 1, 1)
+    likes = 10
+    video_view_count = 100
+
+    def __init__(self, comment_count):
+        self._node = {'comments': comment_count}
+        self.metadata_requests = 0
+
+    @property
+    def comments(self):
+        self.metadata_requests += 1
+        return 3
+
+
+def test_reel_comments_come_from_the_feed_struct():
+    post = FeedPost(7)
+    assert _reel_from_post(post)['comments'] == 7
+    assert post.metadata_requests == 0
+    post = FeedPost(None)
+    assert _reel_from_post(post)['comments'] == 3
+    assert post.metadata_requests == 1
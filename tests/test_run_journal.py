@@ -0,0 +1,56 @@
+from run_journal import RunJournal, DISCOVERED, ENRICHED, STORED, SKIPPED
+
+
+def test_resumes_an_unfinished_run(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    journal = RunJournal(path, target=3)
+    for username in ('a', 'b', 'c', 'd'):
+        assert journal.mark_discovered(username)
+    assert not journal.mark_discovered('a')
+    journal.mark_enriched('b', {'username': 'b', 'engagement': 0.2})
+    journal.mark_stored('c')
+    journal.mark_skipped('d')
+    run_id = journal.run_id
+    journal.close()
+
+    journal = RunJournal(path, target=10)
+    assert journal.resumed
+    assert journal.run_id == run_id
+    assert journal.target == 3
+    assert journal.usernames(DISCOVERED) == ['a']
+    assert journal.results(ENRICHED) == [{'username': 'b', 'engagement': 0.2}]
+    assert journal.progress() == {DISCOVERED: 1, ENRICHED: 1, STORED: 1, SKIPPED: 1}
+    assert not journal.mark_discovered('d')
+    journal.close()
+
+
+def test_fresh_starts_a_new_run(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    journal = RunJournal(path, target=3)
+    journal.mark_stored('a')
+    run_id = journal.run_id
+    journal.close()
+
+    journal = RunJournal(path, target=5, fresh=True)
+    assert not journal.resumed
+    assert journal.run_id != run_id
+    assert journal.target == 5
+    assert journal.progress()[STORED] == 0
+    journal.close()
+
+
+def test_a_finished_run_hands_its_discovered_usernames_to_the_next(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    journal = RunJournal(path, target=1)
+    journal.mark_discovered('left.behind')
+    journal.mark_discovered('stored')
+    journal.mark_stored('stored')
+    journal.finish()
+    journal.close()
+
+    journal = RunJournal(path, target=1)
+    assert not journal.resumed
+    assert journal.carried_over == 1
+    assert journal.usernames(DISCOVERED) == ['left.behind']
+    assert journal.progress()[STORED] == 0
+    journal.close()
@@ -0,0 +1,59 @@
+import csv
+
+from filters import FilterPipeline, seen_before
+from results_db import ResultsDB
+from seen_index import SeenIndex
+
+
+def test_check_and_add_reports_new_usernames_once(tmp_path):
+    seen = SeenIndex(str(tmp_path / 'seen.bloom'), capacity=1000)
+    assert seen.check_and_add('maya.cooks')
+    assert not seen.check_and_add('Maya.Cooks')
+    assert 'maya.cooks' in seen
+    assert 'someone.else' not in seen
+
+
+def test_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    seen = SeenIndex(path, capacity=1000)
+    seen.check_and_add('maya.cooks')
+    seen.save()
+    assert 'maya.cooks' in SeenIndex(path, capacity=1000)
+
+
+def test_ignores_an_index_built_for_another_capacity(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    seen = SeenIndex(path, capacity=1000)
+    seen.check_and_add('maya.cooks')
+    seen.save()
+    assert 'maya.cooks' not in SeenIndex(path, capacity=100000)
+
+
+def test_load_from_csv(tmp_path):
+    path = tmp_path / 'data.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['username', 'engagement'])
+        writer.writeheader()
+        writer.writerows([{'username': 'a', 'engagement': 1}, {'username': 'b', 'engagement': 2}])
+    seen = SeenIndex(str(tmp_path / 'seen.bloom'), capacity=1000)
+    assert seen.load_from_csv([str(path), str(tmp_path / 'missing.csv')]) == 2
+    assert 'a' in seen and 'b' in seen
+
+
+def test_load_usernames_from_the_results_db(tmp_path):
+    with ResultsDB(str(tmp_path / 'results.db')) as db:
+        db.write({'username': 'stored.creator', 'followers_count': 1200, 'engagement': 0.05})
+    seen = SeenIndex(str(tmp_path / 'seen.bloom'), capacity=1000)
+    with ResultsDB(str(tmp_path / 'results.db')) as db:
+        assert seen.load_usernames(db.usernames()) == 1
+    assert 'stored.creator' in seen
+
+
+def test_seen_before_stage_only_checks(tmp_path):
+    seen = SeenIndex(str(tmp_path / 'seen.bloom'), capacity=1000)
+    seen.check_and_add('stored.before')
+    pipeline = FilterPipeline([seen_before(seen)])
+    assert not pipeline.run({'username': 'stored.before'})
+    assert pipeline.run({'username': 'new.creator'})
+    # Recorded only once the creator is stored or skipped, so a dropped one comes back
+    assert pipeline.run({'username': 'new.creator'})
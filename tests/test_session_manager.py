@@ -0,0 +1,31 @@
+import json
+
+import instaloader
+
+from session_manager import SessionManager
+
+
+def storage_state(sessionid):
+    return {
+        'cookies': [
+            {'name': name, 'value': value, 'domain': '.instagram.com', 'path': '/', 'expires': -1}
+            for name, value in (('sessionid', sessionid), ('csrftoken', 'token'))
+        ],
+        'origins': [],
+    }
+
+
+def test_a_renewed_login_reaches_the_instaloaders_built_before_it(tmp_path, monkeypatch):
+    # Renewing also writes instaloader's session file, which lives in the user's config directory
+    monkeypatch.setattr(instaloader.Instaloader, 'save_session_to_file', lambda L, username: None)
+    state_path = tmp_path / 'state.json'
+    state_path.write_text(json.dumps(storage_state('old')), encoding='utf-8')
+    session = SessionManager('scout', 'secret', str(state_path))
+    worker_L = session.new_instaloader()
+    assert worker_L.context._session.cookies.get('sessionid') == 'old'
+
+    session._adopt_state(storage_state('new'))  # What renew_from_browser_async does after a browser re-login
+    assert worker_L.context._session.cookies.get('sessionid') == 'old'
+    assert session.refresh(worker_L) is worker_L
+    assert worker_L.context._session.cookies.get('sessionid') == 'new'
+    assert json.loads(state_path.read_text(encoding='utf-8')) == storage_state('new')
@@ -1,10 +1,10 @@
-from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
-import pandas as pd
-import os
 import time
+from result_sink import CsvResultSink
+from embed_parser import extract_username_from_embed_code
 
 CSV_PATH = 'usernames_and_followers.csv'
+CSV_FIELDS = ['username', 'followers_count']
 
 def login_to_instagram(page, username, password):
     print("Logging in to Instagram...")
@@ -66,29 +66,13 @@ def click_more_options_and_embed(page):
         print("'More Options' button not found.")
     return None
 
-def extract_username_from_embed_code(embed_code):
-    """Extracts the Instagram username from the embed code."""
-    soup = BeautifulSoup(embed_code, "html.parser")
-    a_tag = soup.find("a", string=lambda text: "A post shared by" in text if text else False)
-    if not a_tag:
-        return None
-    text_content = a_tag.get_text(strip=True)
-    username = text_content.split('@')[-1].split(')')[0].strip()
-    return username
-
-def save_username_to_csv(username, followers_count, csv_path):
+def save_username_to_csv(username, followers_count, sink):
     """Saves the Instagram username and follower count to a CSV file."""
-    new_row = pd.DataFrame({
-        'username': [username],
-        'followers_count': [followers_count]
+    sink.write({
+        'username': username,
+        'followers_count': followers_count
     })
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        df = pd.concat([df, new_row], ignore_index=True)
-    else:
-        df = new_row
-    df.to_csv(csv_path, index=False)
-    print(f"Username and followers saved to {csv_path}")
+    print(f"Username and followers saved to {sink.csv_path}")
 
 def close_options_modal(page):
     """Closes the 'More Options' modal by clicking outside it twice."""
@@ -145,6 +129,8 @@ def main():
     if not instagram_username or not instagram_password:
         raise ValueError("Instagram credentials are not set.")
 
+    sink = CsvResultSink(CSV_PATH, CSV_FIELDS)  # Opened once, rows are appended as they come
+
     with sync_playwright() as p:
         browser = p.webkit.launch(headless=False)
         page = browser.new_page()
@@ -163,7 +149,7 @@ def main():
                         print("Username extracted:", username)
                         try:
                             followers_count = get_followers_count(page, username)
-                            save_username_to_csv(username, followers_count, CSV_PATH)
+                            save_username_to_csv(username, followers_count, sink)
                             print(f"Stored {username} with {followers_count} followers.")
                         except Exception as e:
                             print(f"An error occurred while getting followers count for {username}: {e}")
@@ -187,6 +173,7 @@ def main():
         finally:
             print("Closing browser...")
             browser.close()
+            sink.close()
 
 if __name__ == "__main__":
     main()
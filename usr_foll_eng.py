@@ -1,22 +1,13 @@
-from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
-import pandas as pd
-import os
-import time
-import instaloader
+from result_sink import CsvResultSink
+from session_manager import SessionManager
+from reel_stats import get_reel_stats_of_last_reels
 import sqlite3
+from embed_parser import extract_username_from_embed_code
 
 
 CSV_PATH = 'data.csv'
-
-def login_to_instagram(page, username, password):
-    print("Logging in to Instagram...")
-    page.goto('https://www.instagram.com/accounts/login/')
-    page.wait_for_selector("input[name='username']", state="visible")
-    page.fill("input[name='username']", username)
-    page.fill("input[name='password']", password)
-    page.click("button[type='submit']")
-    time.sleep(5)  # Wait for login to complete
+CSV_FIELDS = ['username', 'followers_count', 'engagement']
 
 def navigate_to_reels(page):
     """Navigates to the Instagram Reels page."""
@@ -69,30 +60,14 @@ def click_more_options_and_embed(page):
         print("'More Options' button not found.")
     return None
 
-def extract_username_from_embed_code(embed_code):
-    """Extracts the Instagram username from the embed code."""
-    soup = BeautifulSoup(embed_code, "html.parser")
-    a_tag = soup.find("a", string=lambda text: "A post shared by" in text if text else False)
-    if not a_tag:
-        return None
-    text_content = a_tag.get_text(strip=True)
-    username = text_content.split('@')[-1].split(')')[0].strip()
-    return username
-
-def save_username_to_csv(username, followers_count, engagement, csv_path):
+def save_username_to_csv(username, followers_count, engagement, sink):
     """Saves the Instagram username, follower count, and engagement to a CSV file."""
-    new_row = pd.DataFrame({
-        'username': [username],
-        'followers_count': [followers_count],
-        'engagement': [engagement]
+    sink.write({
+        'username': username,
+        'followers_count': followers_count,
+        'engagement': engagement
     })
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        df = pd.concat([df, new_row], ignore_index=True)
-    else:
-        df = new_row
-    df.to_csv(csv_path, index=False)
-    print(f"Username, followers, and engagement saved to {csv_path}")
+    print(f"Username, followers, and engagement saved to {sink.csv_path}")
 
 
 def close_options_modal(page):
@@ -142,78 +117,6 @@ def get_followers_count(page, username):
     # Use the helper function to parse the text to an integer
     followers_count = parse_followers_count(followers_count_text)
     return followers_count
-def get_total_likes_of_last_reels(username, max_reels=10):
-    L = instaloader.Instaloader()
-
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_likes = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_likes += post.likes
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_likes
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    return None
-def get_total_comments_of_last_reels(username, max_reels=10):
-    L = instaloader.Instaloader()
-
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_comments = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_comments += post.comments  # Fetches the number of comments on the post
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_comments
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    return None
-def get_total_views_of_last_reels(username, max_reels=10):
-    L = instaloader.Instaloader()
-
-    try:
-        profile = instaloader.Profile.from_username(L.context, username)
-        posts = profile.get_posts()
-
-        total_views = 0
-        count = 0
-
-        for post in posts:
-            if post.is_video and count < max_reels:
-                total_views += post.video_view_count  # Fetches the number of views on the reel
-                count += 1
-            if count == max_reels:
-                break
-
-        return total_views
-    except instaloader.exceptions.ProfileNotExistsException:
-        print(f"The profile {username} does not exist.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    return None
 def create_connection(db_file):
     """Create a database connection to a SQLite database."""
     conn = sqlite3.connect(db_file)
@@ -230,10 +133,15 @@ def main():
     if not instagram_username or not instagram_password:
         raise ValueError("Instagram credentials are not set.")
 
+    # Log in once; the browser and instaloader share the same cookies for the whole run
+    session = SessionManager(instagram_username, instagram_password)
+    L = session.instaloader()
+
+    sink = CsvResultSink(CSV_PATH, CSV_FIELDS)  # Opened once, rows are appended as they come
+
     with sync_playwright() as p:
         browser = p.webkit.launch(headless=False)  # Set headless=True to run without opening a browser window
-        page = browser.new_page()
-        login_to_instagram(page, instagram_username, instagram_password)
+        page = session.new_browser_context(browser).new_page()  # Already logged in, no login form
 
         num_users_logged = 0
         max_users_to_log = None  # Set this to an integer if you want to limit the number of users
@@ -247,15 +155,16 @@ def main():
                     if username:
                         try:
                             followers_count = get_followers_count(page, username)
-                            total_likes = get_total_likes_of_last_reels(username)
-                            total_comments = get_total_comments_of_last_reels(username)
-                            total_views = get_total_views_of_last_reels(username)
+                            reel_stats = get_reel_stats_of_last_reels(L, username) or {}
+                            total_likes = reel_stats.get('likes')
+                            total_comments = reel_stats.get('comments')
+                            total_views = reel_stats.get('views')
 
                             # Calculate engagement rate
                             engagement = calculate_engagement(total_likes, total_comments, total_views)
 
                             # Save to CSV
-                            save_username_to_csv(username, followers_count, engagement, CSV_PATH)
+                            save_username_to_csv(username, followers_count, engagement, sink)
                             print(f"Stored {username} with {followers_count} followers and an engagement of {engagement}.")
 
                         except Exception as e:
@@ -277,6 +186,7 @@ def main():
         finally:
             print("Closing browser...")
             browser.close()
+            sink.close()
 
 if __name__ == "__main__":
     main()